@@ -0,0 +1,794 @@
+#!/usr/bin/env python3
+'''
+Load - Load generator and soak test over an in-memory transport
+
+Drives Request/Response round trips, wrapped in Callidus messages, between
+producer and consumer threads over an in-process loopback transport and
+reports throughput, latency percentiles and memory growth.
+
+Usage:
+    python -m callidus.bench.load --producers 2 --consumers 2 --duration 60
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# Shared variables, constants, etc
+
+# System Modules
+import argparse
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+
+from appcore.conversion import ENCODE_METHOD
+
+# Local app modules
+from callidus.comms.message import CallidusMessage
+from callidus.comms.request import Request
+from callidus.comms.response import Response
+from callidus.comms.trace import LatencyHistogram
+from callidus.include.typing import MessagePort, RequestType, Status
+
+# Imports for python variable type hints
+from typing import Dict, List, Tuple
+
+
+###########################################################################
+#
+# Module Specific Items
+#
+###########################################################################
+#
+# Types
+#
+
+#
+# Constants
+#
+# Name of the consumer receiver on the loopback transport
+CONSUMER_NAME = "bench-consumer"
+
+# Action used for the bench requests
+BENCH_ACTION = "bench"
+
+# How long a blocked thread waits before checking if it should stop (secs)
+_POLL_INTERVAL = 0.1
+
+# How long producers wait for in flight responses after stopping (secs)
+DEFAULT_DRAIN_TIMEOUT = 5.0
+
+# Maximum number of packets queued for a receiver on the loopback transport
+DEFAULT_MAX_QUEUE = 10000
+
+#
+# Global Variables
+#
+
+
+###########################################################################
+#
+# LoopbackTransport Class Definition
+#
+###########################################################################
+class LoopbackTransport():
+    '''
+    Class to describe LoopbackTransport - An in-process message transport.
+
+    Packets are delivered to a bounded queue for each receiver, so a slow
+    receiver applies back pressure to the sender.
+
+    Attributes:
+        max_queue (int): Maximum number of packets queued for a receiver
+    '''
+
+    #
+    # __init__
+    #
+    def __init__(
+            self,
+            max_queue: int = DEFAULT_MAX_QUEUE
+    ):
+        '''
+        Initialises the instance.
+
+        Args:
+            max_queue (int): Maximum number of packets queued for a receiver
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        # Private Attributes
+        self.__lock = threading.Lock()
+        self.__queues: Dict[str, queue.Queue] = {}
+
+        # Attributes
+        self.max_queue = max_queue
+
+
+    ###########################################################################
+    #
+    # Functions
+    #
+    ###########################################################################
+    #
+    # _queue
+    #
+    def _queue(self, receiver: str = "") -> queue.Queue:
+        ''' Get the queue for a receiver, creating it if required '''
+        with self.__lock:
+            if receiver not in self.__queues:
+                self.__queues[receiver] = queue.Queue(maxsize=self.max_queue)
+
+            return self.__queues[receiver]
+
+
+    #
+    # publish
+    #
+    def publish(self, receiver: str = "", packet: bytes = b"") -> None:
+        '''
+        Deliver a packet to a receiver
+
+        Args:
+            receiver (str): The receiver to deliver the packet to
+            packet (bytes): The packet to deliver
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        self._queue(receiver).put(packet)
+
+
+    #
+    # consume
+    #
+    def consume(
+            self,
+            receiver: str = "",
+            timeout: float = _POLL_INTERVAL
+    ) -> bytes | None:
+        '''
+        Receive the next packet for a receiver
+
+        Args:
+            receiver (str): The receiver to get the packet for
+            timeout (float): How long to wait for a packet (seconds)
+
+        Returns:
+            bytes | None: The packet, or None if no packet was received
+
+        Raises:
+            None
+        '''
+        try:
+            return self._queue(receiver).get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+###########################################################################
+#
+# LoadStats Class Definition
+#
+###########################################################################
+class LoadStats():
+    '''
+    Class to describe LoadStats - Statistics gathered during a load run.
+
+    Attributes:
+        total (LatencyHistogram): Round trip latency (microseconds) for the
+            whole run
+        interval (LatencyHistogram): Round trip latency (microseconds) since
+            the last report
+        errors (int): Number of round trips that did not succeed
+    '''
+
+    #
+    # __init__
+    #
+    def __init__(self):
+        '''
+        Initialises the instance.
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        # Private Attributes
+        self.__lock = threading.Lock()
+
+        # Attributes
+        self.total = LatencyHistogram()
+        self.interval = LatencyHistogram()
+        self.errors = 0
+
+
+    ###########################################################################
+    #
+    # Functions
+    #
+    ###########################################################################
+    #
+    # record
+    #
+    def record(self, latency: int = 0, ok: bool = True) -> None:
+        '''
+        Record a completed round trip
+
+        Args:
+            latency (int): The round trip latency (microseconds)
+            ok (bool): True if the round trip succeeded
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        with self.__lock:
+            self.interval.record(latency)
+            if not ok: self.errors += 1
+
+
+    #
+    # record_lost
+    #
+    def record_lost(self, count: int = 0) -> None:
+        '''
+        Record round trips that never received a response
+
+        Args:
+            count (int): The number of round trips lost
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        with self.__lock:
+            self.errors += count
+
+
+    #
+    # take_interval
+    #
+    def take_interval(self) -> LatencyHistogram:
+        '''
+        Finish the current interval, adding it to the total
+
+        Args:
+            None
+
+        Returns:
+            LatencyHistogram: The latency for the interval just finished
+
+        Raises:
+            None
+        '''
+        with self.__lock:
+            _interval = self.interval
+            self.interval = LatencyHistogram()
+
+        self.total.merge(_interval)
+        return _interval
+
+
+###########################################################################
+#
+# Functions
+#
+###########################################################################
+#
+# rss_bytes
+#
+def rss_bytes() -> int:
+    '''
+    Determine the resident set size of the process
+
+    Args:
+        None
+
+    Returns:
+        int: The current RSS in bytes (peak RSS if the current RSS is not
+            available, 0 if neither is available)
+
+    Raises:
+        None
+    '''
+    try:
+        with open("/proc/self/statm", "r") as _file:
+            return int(_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    _rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return _rss if sys.platform == "darwin" else _rss * 1024
+
+
+#
+# parse_mix
+#
+def parse_mix(value: str = "") -> List[Tuple[RequestType, int]]:
+    '''
+    Parse the request type mix (eg "ST2_ACTION=3,VALIDATE=1")
+
+    Args:
+        value (str): Comma separated request type names with weights
+
+    Returns:
+        list: Tuples of (request type, weight)
+
+    Raises:
+        ValueError
+            When the mix is not valid
+    '''
+    _mix = []
+    for _item in value.split(","):
+        if not _item.strip(): continue
+
+        _name, _, _weight = _item.partition("=")
+        try:
+            _type = RequestType[_name.strip().upper()]
+        except KeyError:
+            raise ValueError(f"Unknown request type '{_name.strip()}'")
+
+        _mix.append((_type, int(_weight) if _weight else 1))
+
+    if not _mix or sum(_weight for _, _weight in _mix) <= 0:
+        raise ValueError("Request type mix must not be empty")
+
+    return _mix
+
+
+#
+# producer
+#
+def producer(
+        name: str = "",
+        transport: LoopbackTransport | None = None,
+        stats: LoadStats | None = None,
+        stop: threading.Event | None = None,
+        sizes: List[int] = [],
+        mix: List[Tuple[RequestType, int]] = [],
+        window: int = 1,
+        drain_timeout: float = DEFAULT_DRAIN_TIMEOUT
+) -> None:
+    '''
+    Send requests to the consumers and wait for the responses
+
+    Args:
+        name (str): The name of the producer (receiver for responses)
+        transport (LoopbackTransport): The transport to use
+        stats (LoadStats): Where to record the round trips
+        stop (threading.Event): Set when the producer should stop
+        sizes (list): Sizes (bytes) of request data to choose from
+        mix (list): Request types to choose from, with weights
+        window (int): Maximum number of requests awaiting a response
+        drain_timeout (float): How long to wait for responses after stopping
+            (seconds) - requests still awaiting a response are counted as
+            errors
+
+    Returns:
+        None
+
+    Raises:
+        None
+    '''
+    assert transport and stats and stop
+
+    _types = [_type for _type, _ in mix]
+    _weights = [_weight for _, _weight in mix]
+    _payloads = {_size: "x" * _size for _size in sizes}
+    _in_flight: Dict[str, int] = {}
+    _drain_end = 0.0
+
+    while not stop.is_set() or _in_flight:
+        if stop.is_set():
+            if not _drain_end: _drain_end = time.monotonic() + drain_timeout
+            if time.monotonic() >= _drain_end:
+                stats.record_lost(count=len(_in_flight))
+                break
+
+        # Fill the window
+        while not stop.is_set() and len(_in_flight) < window:
+            _request = Request(
+                request_type=random.choices(_types, weights=_weights)[0],
+                action=BENCH_ACTION,
+                data={"payload": _payloads[random.choice(sizes)]}
+            )
+            _message = CallidusMessage(
+                data=_request.packet.decode(ENCODE_METHOD),
+                sender=name,
+                receiver=CONSUMER_NAME,
+                receiver_port=MessagePort.REMOTE,
+                session_id=uuid.uuid4().hex
+            )
+            _in_flight[_message.session_id] = time.perf_counter_ns()
+            transport.publish(receiver=CONSUMER_NAME, packet=_message.packet)
+
+        # Collect a response
+        _packet = transport.consume(receiver=name)
+        if _packet is None: continue
+
+        # An undecodable response is lost (counted when draining)
+        _message = CallidusMessage()
+        try:
+            _message.packet = _packet
+        except (ValueError, TypeError):
+            continue
+
+        _sent = _in_flight.pop(_message.session_id, None)
+        if _sent is None: continue
+
+        _response = Response()
+        if isinstance(_message.data, str):
+            _response.packet = _message.data.encode(ENCODE_METHOD)
+
+        stats.record(
+            latency=(time.perf_counter_ns() - _sent) // 1000,
+            ok=_response.status in (Status.OK, Status.OK.value)
+        )
+
+
+#
+# consumer
+#
+def consumer(
+        transport: LoopbackTransport | None = None,
+        stop: threading.Event | None = None
+) -> None:
+    '''
+    Receive requests and send a response for each one
+
+    Args:
+        transport (LoopbackTransport): The transport to use
+        stop (threading.Event): Set when the consumer should stop
+
+    Returns:
+        None
+
+    Raises:
+        None
+    '''
+    assert transport and stop
+
+    while not stop.is_set():
+        _packet = transport.consume(receiver=CONSUMER_NAME)
+        if _packet is None: continue
+
+        # An undecodable request can't be answered, so the producer will
+        # count it as lost
+        _message = CallidusMessage()
+        try:
+            _message.packet = _packet
+        except (ValueError, TypeError):
+            continue
+
+        _request = Request()
+        if isinstance(_message.data, str):
+            _request.packet = _message.data.encode(ENCODE_METHOD)
+
+        if _request.error or _request.action != BENCH_ACTION or \
+                    not isinstance(_request.data, dict):
+            _response = Response(status=Status.INVALID_ACTION)
+        else:
+            _response = Response(
+                status=Status.OK,
+                result=len(_request.data.get("payload", "")),
+                session_id=_message.session_id
+            )
+
+        _reply = CallidusMessage(
+            data=_response.packet.decode(ENCODE_METHOD),
+            sender=CONSUMER_NAME,
+            receiver=_message.sender,
+            receiver_port=_message.sender_port,
+            session_id=_message.session_id,
+            timestamp=_message.timestamp,
+            ttl=_message.ttl
+        )
+        transport.publish(receiver=_message.sender, packet=_reply.packet)
+
+
+#
+# _format_latency
+#
+def _format_latency(histogram: LatencyHistogram) -> str:
+    ''' Format the latency percentiles of a histogram '''
+    return (
+        f"p50={histogram.percentile(50.0)}us " +
+        f"p99={histogram.percentile(99.0)}us " +
+        f"p999={histogram.percentile(99.9)}us"
+    )
+
+
+#
+# run
+#
+def run(
+        producers: int = 1,
+        consumers: int = 1,
+        duration: float = 10.0,
+        sizes: List[int] = [64],
+        mix: List[Tuple[RequestType, int]] = [(RequestType.ST2_ACTION, 1)],
+        window: int = 16,
+        interval: float = 5.0,
+        warmup: float = 1.0,
+        drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+        out = sys.stdout
+) -> Dict[str, float]:
+    '''
+    Run the load test, reporting progress at each interval
+
+    Args:
+        producers (int): Number of producer threads
+        consumers (int): Number of consumer threads
+        duration (float): How long to run for (seconds)
+        sizes (list): Sizes (bytes) of request data to choose from
+        mix (list): Request types to choose from, with weights
+        window (int): Maximum requests awaiting a response per producer
+        interval (float): How often to report progress (seconds)
+        warmup (float): Time before the baseline RSS is taken (seconds)
+            (the RSS at the start is used if the run ends before the warmup)
+        drain_timeout (float): How long to wait for responses after stopping
+            (seconds)
+        out (file): Where to write the report
+
+    Returns:
+        dict: Summary of the run (round trips, errors, throughput,
+            latency percentiles and RSS growth)
+
+    Raises:
+        ValueError
+            When the window is larger than the transport queue
+    '''
+    _transport = LoopbackTransport()
+
+    # A producer only collects responses once its window is full, so a
+    # window larger than its response queue would deadlock
+    if window > _transport.max_queue:
+        raise ValueError(
+            f"Window ({window}) exceeds transport queue " +
+            f"({_transport.max_queue})"
+        )
+    _stats = LoadStats()
+    _stop_producers = threading.Event()
+    _stop_consumers = threading.Event()
+
+    _consumers = [
+        threading.Thread(
+            target=consumer,
+            kwargs={"transport": _transport, "stop": _stop_consumers},
+            daemon=True
+        )
+        for _ in range(consumers)
+    ]
+    _producers = [
+        threading.Thread(
+            target=producer,
+            kwargs={
+                "name": f"bench-producer-{_index}",
+                "transport": _transport,
+                "stats": _stats,
+                "stop": _stop_producers,
+                "sizes": sizes,
+                "mix": mix,
+                "window": window,
+                "drain_timeout": drain_timeout
+            },
+            daemon=True
+        )
+        for _index in range(producers)
+    ]
+
+    for _thread in _consumers + _producers: _thread.start()
+
+    _start = time.monotonic()
+    _end = _start + duration
+    _start_rss = rss_bytes()
+    _baseline_rss = 0
+    _last = _start
+
+    while time.monotonic() < _end:
+        _wake = min(_last + interval, _end)
+        if not _baseline_rss: _wake = min(_wake, _start + warmup)
+        time.sleep(max(_wake - time.monotonic(), 0))
+
+        _now = time.monotonic()
+        if not _baseline_rss and _now - _start >= warmup:
+            _baseline_rss = rss_bytes()
+
+        if _now - _last >= interval:
+            _histogram = _stats.take_interval()
+            _rss = rss_bytes()
+            _growth = _rss - (_baseline_rss or _start_rss)
+            out.write(
+                f"[{_now - _start:8.1f}s] " +
+                f"{_histogram.count / (_now - _last):10.0f} rt/s " +
+                f"{_format_latency(_histogram)} " +
+                f"rss={_rss / 1048576:.1f}MiB " +
+                f"growth={_growth / 1048576:+.1f}MiB\n"
+            )
+            out.flush()
+            _last = _now
+
+    # Stop producing, let the in flight requests complete, then stop consuming
+    _stop_producers.set()
+    for _thread in _producers: _thread.join()
+    _stop_consumers.set()
+    for _thread in _consumers: _thread.join()
+
+    _elapsed = time.monotonic() - _start
+    _stats.take_interval()
+    _rss = rss_bytes()
+
+    return {
+        "round_trips": _stats.total.count,
+        "errors": _stats.errors,
+        "elapsed": _elapsed,
+        "throughput": _stats.total.count / _elapsed if _elapsed else 0.0,
+        "p50": _stats.total.percentile(50.0),
+        "p99": _stats.total.percentile(99.0),
+        "p999": _stats.total.percentile(99.9),
+        "max": _stats.total.max,
+        "rss": _rss,
+        "rss_growth": _rss - (_baseline_rss or _start_rss),
+    }
+
+
+#
+# main
+#
+def main(argv: List[str] | None = None) -> int:
+    '''
+    Command line entry point
+
+    Args:
+        argv (list): Command line arguments (sys.argv if None)
+
+    Returns:
+        int: Exit code (1 if errors occurred or the RSS growth limit was
+            exceeded)
+
+    Raises:
+        None
+    '''
+    _parser = argparse.ArgumentParser(
+        prog="python -m callidus.bench.load",
+        description="Callidus message load generator and soak test"
+    )
+    _parser.add_argument("--producers", type=int, default=1,
+                         help="number of producer threads")
+    _parser.add_argument("--consumers", type=int, default=1,
+                         help="number of consumer threads")
+    _parser.add_argument("--duration", type=float, default=10.0,
+                         help="seconds to run for")
+    _parser.add_argument("--sizes", default="64",
+                         help="comma separated request data sizes (bytes)")
+    _parser.add_argument("--mix", default="ST2_ACTION=1",
+                         help="request type mix, eg ST2_ACTION=3,VALIDATE=1")
+    _parser.add_argument("--window", type=int, default=16,
+                         help="requests in flight per producer")
+    _parser.add_argument("--interval", type=float, default=5.0,
+                         help="seconds between progress reports")
+    _parser.add_argument("--warmup", type=float, default=1.0,
+                         help="seconds before the baseline RSS is taken")
+    _parser.add_argument("--drain-timeout", type=float,
+                         default=DEFAULT_DRAIN_TIMEOUT,
+                         help="seconds to wait for responses after stopping")
+    _parser.add_argument("--max-rss-growth", type=float, default=0.0,
+                         help="fail if RSS grows by more than this many MiB")
+    _args = _parser.parse_args(argv)
+
+    try:
+        _sizes = [int(_size) for _size in _args.sizes.split(",") if _size]
+        _mix = parse_mix(_args.mix)
+    except ValueError as err:
+        _parser.error(str(err))
+
+    if not _sizes or min(_sizes) < 0:
+        _parser.error("sizes must be zero or more bytes")
+
+    if _args.producers < 1 or _args.consumers < 1 or _args.window < 1:
+        _parser.error("producers, consumers and window must be at least 1")
+
+    # A producer only collects responses once its window is full, so a
+    # window larger than its response queue would deadlock
+    if _args.window > DEFAULT_MAX_QUEUE:
+        _parser.error(f"window must be at most {DEFAULT_MAX_QUEUE}")
+
+    if _args.interval <= 0:
+        _parser.error("interval must be greater than 0")
+
+    if _args.warmup < 0 or _args.warmup >= _args.duration:
+        _parser.error("warmup must be zero or more and less than duration")
+
+    if _args.drain_timeout < 0:
+        _parser.error("drain timeout must be zero or more")
+
+    _summary = run(
+        producers=_args.producers,
+        consumers=_args.consumers,
+        duration=_args.duration,
+        sizes=_sizes,
+        mix=_mix,
+        window=_args.window,
+        interval=_args.interval,
+        warmup=_args.warmup,
+        drain_timeout=_args.drain_timeout
+    )
+
+    print(
+        f"round trips={_summary['round_trips']} " +
+        f"errors={_summary['errors']} " +
+        f"elapsed={_summary['elapsed']:.1f}s " +
+        f"throughput={_summary['throughput']:.0f} rt/s"
+    )
+    print(
+        f"latency p50={_summary['p50']}us p99={_summary['p99']}us " +
+        f"p999={_summary['p999']}us max={_summary['max']}us"
+    )
+    print(
+        f"rss={_summary['rss'] / 1048576:.1f}MiB " +
+        f"growth={_summary['rss_growth'] / 1048576:+.1f}MiB"
+    )
+
+    if _summary["errors"]:
+        return 1
+
+    if _args.max_rss_growth and \
+            _summary["rss_growth"] > _args.max_rss_growth * 1048576:
+        return 1
+
+    return 0
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    sys.exit(main())
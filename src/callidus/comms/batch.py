@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+'''
+Batch - Coalescing of small messages to the same receiver into one envelope
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# Shared variables, constants, etc
+
+# System Modules
+import threading
+import time
+import pika
+from appcore.conversion import ENCODE_METHOD
+from appcore.conversion import to_json, from_json
+
+# Local app modules
+from callidus.comms.message import CallidusMessage
+from callidus.include.buffer import as_buffer
+
+# Imports for python variable type hints
+from typing import Callable, Dict, List, Tuple
+from callidus.include.buffer import Buffer
+from callidus.include.typing import MessagePort
+
+
+###########################################################################
+#
+# Module Specific Items
+#
+###########################################################################
+#
+# Types
+#
+# Key for a group of messages - (receiver, receiver port)
+BatchKey = Tuple[str, MessagePort]
+
+#
+# Constants
+#
+# Message type (and RMQ type) of a batch envelope
+BATCH_MESSAGE_TYPE = "CALLIDUS_BATCH"
+
+# Largest batch packet that will be decoded
+MAX_BATCH_SIZE = 16777216
+
+# Default flush triggers
+DEFAULT_MAX_MESSAGES = 64
+DEFAULT_MAX_BYTES = 0
+DEFAULT_LINGER = 0.005
+
+#
+# Global Variables
+#
+
+
+###########################################################################
+#
+# MessageBatch Class Definition
+#
+###########################################################################
+class MessageBatch():
+    '''
+    Class to describe MessageBatch - An envelope containing many messages.
+
+    Property values common to every message in the batch are sent once for
+    the batch, with each message only carrying the properties that differ.
+
+    Attributes:
+        messages (list): The Callidus messages in the batch
+        packet (bytes): A byte encoded JSON string suitable for sending over
+            a messaging system. If set, the messages are replaced with the
+            messages in the packet (a packet for a single Callidus message
+            results in a batch of one message). Raises ValueError if larger
+            than MAX_BATCH_SIZE or not valid JSON
+        rmq_properties (pika.BasicProperties) [ReadOnly]: The properties of
+            the batch in RMQ format
+    '''
+
+    #
+    # __init__
+    #
+    def __init__(
+            self,
+            messages: List[CallidusMessage] | None = None
+    ):
+        '''
+        Initialises the instance.
+
+        Args:
+            messages (list): The Callidus messages in the batch
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        # Private Attributes
+
+        # Attributes
+        self.messages: List[CallidusMessage] = list(messages or [])
+
+
+    ###########################################################################
+    #
+    # Properties
+    #
+    ###########################################################################
+    #
+    # packet
+    #
+    @property
+    def packet(self) -> bytes:
+        ''' A batch packet suitable to be sent '''
+        _all_props = [_message.properties for _message in self.messages]
+
+        # Find the properties shared by all of the messages
+        _shared = dict(_all_props[0]) if _all_props else {}
+        for _props in _all_props[1:]:
+            for _key in list(_shared):
+                if _key not in _props or _props[_key] != _shared[_key]:
+                    del _shared[_key]
+
+        _entries = []
+        for _message, _props in zip(self.messages, _all_props):
+            _entry = { "data": _message.data }
+            _own_props = {
+                _key: _value for _key, _value in _props.items()
+                if _key not in _shared
+            }
+            if _own_props: _entry["properties"] = _own_props
+            _entries.append(_entry)
+
+        _msg_dict = {
+            "batch": _entries,
+            "properties": _shared
+        }
+
+        _value_json = to_json(data=_msg_dict, skip_invalid=True)
+        return _value_json.encode(ENCODE_METHOD)
+
+
+    @packet.setter
+    def packet(self, value: Buffer = b"") -> None:
+        ''' Import a received batch (or single message) into the batch '''
+        _view = as_buffer(value)
+        if _view is None:
+            return
+
+        # Check the size before doing any decoding
+        if _view.nbytes > MAX_BATCH_SIZE:
+            raise ValueError(
+                f"Packet size ({_view.nbytes}) exceeds limit " +
+                f"({MAX_BATCH_SIZE})"
+            )
+
+        _value_json = str(_view, ENCODE_METHOD)
+        if _value_json:
+            _msg_dict = from_json(data=_value_json)
+        else:
+            _msg_dict = {}
+
+        self.messages = []
+        if not isinstance(_msg_dict, dict):
+            return
+
+        _shared = _msg_dict.get("properties", {})
+        if not isinstance(_shared, dict): _shared = {}
+
+        # A packet for a single message is a batch of one
+        if "batch" in _msg_dict and isinstance(_msg_dict["batch"], list):
+            _entries = _msg_dict["batch"]
+        else:
+            _entries = [_msg_dict]
+            _shared = {}
+
+        for _entry in _entries:
+            if not isinstance(_entry, dict): continue
+
+            _message = CallidusMessage()
+            _message.properties = _shared
+            if "data" in _entry: _message.data = _entry["data"]
+            if "properties" in _entry:
+                _message.properties = _entry["properties"]
+
+            self.messages.append(_message)
+
+
+    #
+    # rmq_properties
+    #
+    @property
+    def rmq_properties(self) -> pika.BasicProperties:
+        ''' The properties of the batch in RMQ format '''
+        _headers = {
+            "batch_size": len(self.messages),
+        }
+
+        # All messages in a batch are for the same receiver
+        if self.messages:
+            _first = self.messages[0]
+            _headers["sender"] = _first.sender
+            _headers["sender_port"] = _first.sender_port.value
+            _headers["receiver"] = _first.receiver
+            _headers["receiver_port"] = _first.receiver_port.value
+
+        return pika.BasicProperties(
+            content_type='application/json',
+            type=BATCH_MESSAGE_TYPE,
+            headers=_headers
+        )
+
+
+###########################################################################
+#
+# MessageBatcher Class Definition
+#
+###########################################################################
+class MessageBatcher():
+    '''
+    Class to describe MessageBatcher - Groups messages into batches.
+
+    Messages are grouped by receiver/receiver port.  A group is sent as a
+    batch when it reaches the maximum number of messages or bytes, or when
+    the first message in the group has waited for the linger time (similar
+    to Nagle's algorithm).
+
+    The batcher does not run its own thread - 'poll' should be called
+    regularly (eg from the publishing loop) to send groups that have
+    waited for the linger time.
+
+    Batches are published one at a time, in the order they are taken, so
+    messages to a receiver stay in order when 'add'/'poll' are called from
+    many threads.
+
+    Attributes:
+        publish (Callable): Called with each MessageBatch to be sent
+        max_messages (int): Number of messages that triggers a send
+        max_bytes (int): Size of the message data (JSON encoded) that
+            triggers a send (0 = size not checked)
+        linger (float): Longest time a message waits to be sent (seconds)
+        pending (int) [ReadOnly]: Number of messages waiting to be sent
+    '''
+
+    #
+    # __init__
+    #
+    def __init__(
+            self,
+            publish: Callable[[MessageBatch], None] | None = None,
+            max_messages: int = DEFAULT_MAX_MESSAGES,
+            max_bytes: int = DEFAULT_MAX_BYTES,
+            linger: float = DEFAULT_LINGER
+    ):
+        '''
+        Initialises the instance.
+
+        Args:
+            publish (Callable): Called with each MessageBatch to be sent
+            max_messages (int): Number of messages that triggers a send
+            max_bytes (int): Size of the message data (JSON encoded) that
+                triggers a send (0 = size not checked)
+            linger (float): Longest time a message waits to be sent (seconds)
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        # Private Attributes
+        self.__lock = threading.Lock()
+        self.__publish_lock = threading.RLock()
+        self.__groups: Dict[BatchKey, List[CallidusMessage]] = {}
+        self.__group_bytes: Dict[BatchKey, int] = {}
+        self.__group_start: Dict[BatchKey, float] = {}
+
+        # Attributes
+        self.publish = publish
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.linger = linger
+
+
+    ###########################################################################
+    #
+    # Properties
+    #
+    ###########################################################################
+    #
+    # pending
+    #
+    @property
+    def pending(self) -> int:
+        ''' Number of messages waiting to be sent '''
+        with self.__lock:
+            return sum(len(_group) for _group in self.__groups.values())
+
+
+    ###########################################################################
+    #
+    # Functions
+    #
+    ###########################################################################
+    #
+    # _take_group
+    #
+    def _take_group(self, key: BatchKey) -> MessageBatch:
+        ''' Remove a group, returning it as a batch (lock must be held) '''
+        self.__group_bytes.pop(key, None)
+        self.__group_start.pop(key, None)
+        return MessageBatch(messages=self.__groups.pop(key, []))
+
+
+    #
+    # _send
+    #
+    def _send(self, batches: List[MessageBatch]) -> int:
+        ''' Publish batches (publish lock must be held) '''
+        for _batch in batches:
+            if self.publish: self.publish(_batch)
+
+        return len(batches)
+
+
+    #
+    # add
+    #
+    def add(self, message: CallidusMessage | None = None) -> int:
+        '''
+        Add a message to be sent
+
+        Args:
+            message (CallidusMessage): The message to send
+
+        Returns:
+            int: The number of batches sent
+
+        Raises:
+            None
+        '''
+        if not isinstance(message, CallidusMessage):
+            return 0
+
+        _key = (message.receiver, message.receiver_port)
+        _size = len(message.data_bytes) if self.max_bytes > 0 else 0
+        _now = time.monotonic()
+        _batches = []
+
+        # Hold the publish lock from taking a group until it is published,
+        # so batches to a receiver are published in the order taken
+        with self.__publish_lock:
+            with self.__lock:
+                if _key not in self.__groups:
+                    self.__groups[_key] = []
+                    self.__group_bytes[_key] = 0
+                    self.__group_start[_key] = _now
+
+                self.__groups[_key].append(message)
+                self.__group_bytes[_key] += _size
+
+                if len(self.__groups[_key]) >= self.max_messages or \
+                        (self.max_bytes > 0 and
+                         self.__group_bytes[_key] >= self.max_bytes) or \
+                        _now - self.__group_start[_key] >= self.linger:
+                    _batches.append(self._take_group(_key))
+
+            return self._send(_batches)
+
+
+    #
+    # poll
+    #
+    def poll(self) -> int:
+        '''
+        Send any groups that have waited for the linger time
+
+        Args:
+            None
+
+        Returns:
+            int: The number of batches sent
+
+        Raises:
+            None
+        '''
+        _now = time.monotonic()
+
+        with self.__publish_lock:
+            with self.__lock:
+                _batches = [
+                    self._take_group(_key)
+                    for _key, _start in list(self.__group_start.items())
+                    if _now - _start >= self.linger
+                ]
+
+            return self._send(_batches)
+
+
+    #
+    # flush
+    #
+    def flush(self) -> int:
+        '''
+        Send all waiting messages
+
+        Args:
+            None
+
+        Returns:
+            int: The number of batches sent
+
+        Raises:
+            None
+        '''
+        with self.__publish_lock:
+            with self.__lock:
+                _batches = [
+                    self._take_group(_key) for _key in list(self.__groups)
+                ]
+
+            return self._send(_batches)
+
+
+###########################################################################
+#
+# Functions
+#
+###########################################################################
+#
+# unpack
+#
+def unpack(packet: Buffer = b"") -> List[CallidusMessage]:
+    '''
+    Split a received packet into Callidus messages
+
+    Args:
+        packet (Buffer): A batch packet or a single message packet
+
+    Returns:
+        list: The Callidus messages in the packet
+
+    Raises:
+        None
+    '''
+    _batch = MessageBatch()
+    _batch.packet = packet
+    return _batch.messages
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
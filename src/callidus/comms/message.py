@@ -24,16 +24,19 @@ from __future__ import annotations
 # Shared variables, constants, etc
 
 # System Modules
+import time
 import pika
 from appcore.conversion import ENCODE_METHOD, DataType
 from appcore.conversion import to_json, from_json, get_value_type
 from appcore.util.functions import timestamp as create_timestamp
 
 # Local app modules
+from callidus.include.buffer import as_buffer, write_into
 
 # Imports for python variable type hints
-from typing import Any
+from typing import Any, List
 from callidus.include.typing import MessagePort
+from callidus.include.buffer import Buffer, WritableBuffer
 
 
 ###########################################################################
@@ -48,6 +51,11 @@ from callidus.include.typing import MessagePort
 #
 # Constants
 #
+# Maximum number of hops kept in the trace (oldest hops are discarded)
+MAX_TRACE_HOPS = 32
+
+# Largest packet that will be decoded
+MAX_PACKET_SIZE = 2097152
 
 #
 # Global Variables
@@ -80,11 +88,16 @@ class CallidusMessage():
             This is not preserved in packet
         session_id (str): Session ID (From imported message)
             This is preserved in packet
+        trace (list): Hops the message has passed through, each being
+            [node_id, timestamp in microseconds] (Empty if not traced)
+            This is preserved in packet
         data_bytes (bytes): The data converted to JSON and encoded in byte
             format when possible (if not JSON compatible will be empty)
+        properties (dict): The message properties as included in the packet
         packet (bytes): A byte encode JSON string suitable for sending over
-            a messaging system. If set, will attemp to set isntance values
-            from the packet
+            a messaging system. If set (from bytes, bytearray or memoryview),
+            will attemp to set isntance values from the packet (raises
+            ValueError if larger than MAX_PACKET_SIZE or not valid JSON)
     '''
 
     #
@@ -135,6 +148,7 @@ class CallidusMessage():
         self.message_type = ""
         self.timestamp = timestamp or create_timestamp()
         self.ttl = ttl
+        self.trace: List[list] = []
 
 
     ###########################################################################
@@ -176,37 +190,72 @@ class CallidusMessage():
 
 
     @data_bytes.setter
-    def data_bytes(self, value: bytes = b"") -> None:
+    def data_bytes(self, value: Buffer = b"") -> None:
         ''' Take the data in byte format, and convert it from JSON  '''
-        if not isinstance(value, bytes):
+        _view = as_buffer(value)
+        if _view is None:
             return
 
-        _data_json = value.decode(ENCODE_METHOD)
+        _data_json = str(_view, ENCODE_METHOD)
         if _data_json:
             self.data = from_json(data=_data_json)
         else:
             self.data = None
 
 
+    #
+    # properties
+    #
+    @property
+    def properties(self) -> dict:
+        ''' The message properties as included in the packet '''
+        # message_id is intentionally omitted so a new ID can be created
+        _props = {
+            "sender": self.sender,
+            "sender_port": self.sender_port.value,
+            "receiver": self.receiver,
+            "receiver_port": self.receiver_port.value,
+            "message_type": self.message_type,
+            "session_id": self.session_id,
+            "timestamp": self.timestamp,
+            "ttl": self.ttl,
+        }
+
+        if self.trace: _props["trace"] = self.trace
+
+        return _props
+
+
+    @properties.setter
+    def properties(self, value: dict | None = None) -> None:
+        ''' Import the message properties from a received packet '''
+        if not isinstance(value, dict):
+            return
+
+        _props = value
+        if "sender" in _props: self.sender = _props['sender']
+        if "sender_port" in _props:
+            self.sender_port = MessagePort(_props["sender_port"])
+        if "receiver" in _props: self.receiver = _props['receiver']
+        if "receiver_port" in _props:
+            self.receiver_port = MessagePort(_props["receiver_port"])
+        if "message_type" in _props: self.message_type = _props['message_type']
+        if "message_id" in _props: self.__message_id = _props['message_id']
+        if "session_id" in _props: self.session_id = _props['session_id']
+        if "timestamp" in _props: self.timestamp = _props['timestamp']
+        if "ttl" in _props: self.ttl = _props['ttl']
+        if "trace" in _props: self.trace = _import_trace(_props['trace'])
+
+
     #
     # packet
     #
     @property
     def packet(self) -> bytes:
         ''' A messaage packet suitable to be sent '''
-        # message_id is intentionally omitted so a new ID can be created
         _msg_dict = {
             "data": self.data,
-            "properties": {
-                "sender": self.sender,
-                "sender_port": self.sender_port.value,
-                "receiver": self.receiver,
-                "receiver_port": self.receiver_port.value,
-                "message_type": self.message_type,
-                "session_id": self.session_id,
-                "timestamp": self.timestamp,
-                "ttl": self.ttl,
-            }
+            "properties": self.properties
         }
 
         _value_json = to_json(data=_msg_dict, skip_invalid=True)
@@ -214,37 +263,29 @@ class CallidusMessage():
 
 
     @packet.setter
-    def packet(self, value: bytes = b"") -> None:
+    def packet(self, value: Buffer = b"") -> None:
         ''' Import a received message into the Callidus message class '''
-        # Convert the message
-        if not isinstance(value, bytes):
+        # Convert the message (decoding directly from the buffer)
+        _view = as_buffer(value)
+        if _view is None:
             return
 
-        _value_json = value.decode(ENCODE_METHOD)
+        # Check the size before doing any decoding
+        if _view.nbytes > MAX_PACKET_SIZE:
+            raise ValueError(
+                f"Packet size ({_view.nbytes}) exceeds limit " +
+                f"({MAX_PACKET_SIZE})"
+            )
+
+        _value_json = str(_view, ENCODE_METHOD)
         if _value_json:
             _msg_dict = from_json(data=_value_json)
         else:
             _msg_dict = {}
 
         if "data" in _msg_dict: self.data = _msg_dict["data"]
-
-        if "properties" in _msg_dict and \
-                    isinstance(_msg_dict["properties"], dict):
-            _props = _msg_dict["properties"]
-        else:
-            _props = {}
-        
-        if "sender" in _props: self.sender = _props['sender']
-        if "sender_port" in _props:
-            self.sender_port = MessagePort(_props["sender_port"])
-        if "receiver" in _props: self.receiver = _props['receiver']
-        if "receiver_port" in _props:
-            self.receiver_port = MessagePort(_props["receiver_port"])
-        if "message_type" in _props: self.message_type = _props['message_type']
-        if "message_id" in _props: self.__message_id = _props['message_id']
-        if "session_id" in _props: self.session_id = _props['session_id']
-        if "timestamp" in _props: self.timestamp = _props['timestamp']
-        if "ttl" in _props: self.ttl = _props['ttl']
+        if "properties" in _msg_dict:
+            self.properties = _msg_dict["properties"]
 
 
     #
@@ -262,6 +303,8 @@ class CallidusMessage():
             "request_ttl": self.ttl,
         }
 
+        if self.trace: _headers["trace"] = self.trace
+
         return pika.BasicProperties(
             content_type='application/json',
             correlation_id=self.session_id,
@@ -292,6 +335,87 @@ class CallidusMessage():
             if "request_timestamp" in _headers:
                 self.timestamp = _headers["request_timestamp"]
             if "request_ttl" in _headers: self.ttl = _headers["request_ttl"]
+            if "trace" in _headers:
+                self.trace = _import_trace(_headers["trace"])
+
+
+    ###########################################################################
+    #
+    # Functions
+    #
+    ###########################################################################
+    #
+    # encode_into
+    #
+    def encode_into(
+            self,
+            buffer: WritableBuffer | None = None,
+            offset: int = 0
+    ) -> int:
+        '''
+        Write the packet into a preallocated buffer
+
+        Args:
+            buffer (WritableBuffer): The buffer to write the packet into
+            offset (int): The position in the buffer to write the packet at
+
+        Returns:
+            int: The length of the packet written
+
+        Raises:
+            TypeError
+                When the buffer is not writable
+            ValueError
+                When the packet does not fit in the buffer at the offset
+        '''
+        return write_into(buffer=buffer, offset=offset, data=self.packet)
+
+
+    #
+    # add_hop
+    #
+    def add_hop(self, node_id: str = "") -> None:
+        '''
+        Record the message passing through a node in the trace
+
+        Args:
+            node_id (str): The ID of the node the message is at
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        self.trace.append([node_id, time.time_ns() // 1000])
+        if len(self.trace) > MAX_TRACE_HOPS:
+            del self.trace[:-MAX_TRACE_HOPS]
+
+
+###########################################################################
+#
+# Functions
+#
+###########################################################################
+#
+# _import_trace
+#
+def _import_trace(value: Any = None) -> List[list]:
+    ''' Convert a received trace, dropping any invalid hops '''
+    if not isinstance(value, (list, tuple)):
+        return []
+
+    _trace = []
+    for _hop in value[-MAX_TRACE_HOPS:]:
+        if isinstance(_hop, (list, tuple)) and len(_hop) == 2 and \
+                    isinstance(_hop[1], int) and \
+                    not isinstance(_hop[1], bool):
+            _node = _hop[0]
+            if isinstance(_node, bytes):
+                _node = _node.decode(ENCODE_METHOD, errors="replace")
+            _trace.append([str(_node), _hop[1]])
+
+    return _trace
 
 
 ###########################################################################
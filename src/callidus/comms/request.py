@@ -28,10 +28,12 @@ from appcore.conversion import ENCODE_METHOD
 from appcore.conversion import to_json, from_json, to_base64, from_base64
 
 # Local app modules
+from callidus.include.buffer import as_buffer, write_into
 from callidus.include.typing import RequestType
 
 # Imports for python variable type hints
 from typing import Any
+from callidus.include.buffer import Buffer, WritableBuffer
 
 
 ###########################################################################
@@ -46,6 +48,8 @@ from typing import Any
 #
 # Constants
 #
+# Largest (base64 encoded) packet that will be decoded
+MAX_PACKET_SIZE = 1048576
 
 #
 # Global Variables
@@ -68,6 +72,8 @@ class Request():
         action (str): The actin to be carried out
         data (Any): The data to be sent as part of the request
             (MUST be serialisable via JSON)
+        error (str): Description of the problem if the last packet
+            imported could not be decoded (empty if decoded successfully)
     '''
 
     #
@@ -100,6 +106,7 @@ class Request():
         self.type = request_type
         self.action = action        
         self.data = data        
+        self.error = ""
 
 
     ###########################################################################
@@ -135,15 +142,26 @@ class Request():
 
 
     @packet.setter
-    def packet(self, value: bytes = b"") -> None:
+    def packet(self, value: Buffer = b"") -> None:
         ''' Import a received message into the response class '''
-        # Convert the message
-        if not isinstance(value, bytes):
+        # Convert the message (decoding directly from the buffer)
+        _view = as_buffer(value)
+        if _view is None:
             return
 
+        self.error = ""
         _msg_dict = {}
+
+        # Check the size before doing any decoding
+        if _view.nbytes > MAX_PACKET_SIZE:
+            self.error = (
+                f"Packet size ({_view.nbytes}) exceeds limit " +
+                f"({MAX_PACKET_SIZE})"
+            )
+            _view = memoryview(b"")
+
         try:
-            _value_base64 = value.decode(ENCODE_METHOD)
+            _value_base64 = str(_view, ENCODE_METHOD)
             if _value_base64:
                 _value_json = from_base64(
                     data=_value_base64
@@ -154,20 +172,60 @@ class Request():
             if _value_json:
                 _msg_dict = from_json(data=_value_json)
 
-        except:
-            pass
+        except (ValueError, TypeError, RecursionError) as err:
+            self.error = f"Unable to decode packet: {err}"
+
+        if not isinstance(_msg_dict, dict):
+            self.error = "Packet does not contain a request"
+            _msg_dict = {}
 
         try:
             self.type = RequestType(
                 _msg_dict.get('type', RequestType.NONE.value)
             )
-        except:
+        except (ValueError, TypeError):
             self.type = RequestType.NONE
 
-        self.action = _msg_dict.get('action', None)
+        self.action = _msg_dict.get('action', "")
+        if not isinstance(self.action, str):
+            self.error = "Request action must be a string"
+            self.action = ""
+
         self.data = _msg_dict.get('data', None)
 
 
+    ###########################################################################
+    #
+    # Functions
+    #
+    ###########################################################################
+    #
+    # encode_into
+    #
+    def encode_into(
+            self,
+            buffer: WritableBuffer | None = None,
+            offset: int = 0
+    ) -> int:
+        '''
+        Write the packet into a preallocated buffer
+
+        Args:
+            buffer (WritableBuffer): The buffer to write the packet into
+            offset (int): The position in the buffer to write the packet at
+
+        Returns:
+            int: The length of the packet written
+
+        Raises:
+            TypeError
+                When the buffer is not writable
+            ValueError
+                When the packet does not fit in the buffer at the offset
+        '''
+        return write_into(buffer=buffer, offset=offset, data=self.packet)
+
+
 ###########################################################################
 #
 # In case this is run directly rather than imported...
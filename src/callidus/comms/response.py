@@ -28,10 +28,12 @@ from appcore.conversion import ENCODE_METHOD
 from appcore.conversion import to_json, from_json, to_base64, from_base64
 
 # Local app modules
+from callidus.include.buffer import as_buffer, write_into
 from callidus.include.typing import Status
 
 # Imports for python variable type hints
 from typing import Any
+from callidus.include.buffer import Buffer, WritableBuffer
 
 
 ###########################################################################
@@ -151,15 +153,16 @@ class Response():
 
 
     @packet.setter
-    def packet(self, value: bytes = b"") -> None:
+    def packet(self, value: Buffer = b"") -> None:
         ''' Import a received message into the response class '''
-        # Convert the message
-        if not isinstance(value, bytes):
+        # Convert the message (decoding directly from the buffer)
+        _view = as_buffer(value)
+        if _view is None:
             return
 
         _msg_dict = {}
         try:
-            _value_base64 = value.decode(ENCODE_METHOD)
+            _value_base64 = str(_view, ENCODE_METHOD)
             if _value_base64:
                 _value_json = from_base64(
                     data=_value_base64
@@ -170,15 +173,50 @@ class Response():
             if _value_json:
                 _msg_dict = from_json(data=_value_json)
 
-        except:
+        except (ValueError, TypeError, RecursionError):
             pass
 
+        if not isinstance(_msg_dict, dict):
+            _msg_dict = {}
+
         self.status = _msg_dict.get('status', Status.UNKNOWN)
         self.result = _msg_dict.get('result', None)
         self.task_id = _msg_dict.get('task_id', "")
         self.msg = _msg_dict.get('msg', "")
 
 
+    ###########################################################################
+    #
+    # Functions
+    #
+    ###########################################################################
+    #
+    # encode_into
+    #
+    def encode_into(
+            self,
+            buffer: WritableBuffer | None = None,
+            offset: int = 0
+    ) -> int:
+        '''
+        Write the packet into a preallocated buffer
+
+        Args:
+            buffer (WritableBuffer): The buffer to write the packet into
+            offset (int): The position in the buffer to write the packet at
+
+        Returns:
+            int: The length of the packet written
+
+        Raises:
+            TypeError
+                When the buffer is not writable
+            ValueError
+                When the packet does not fit in the buffer at the offset
+        '''
+        return write_into(buffer=buffer, offset=offset, data=self.packet)
+
+
 ###########################################################################
 #
 # In case this is run directly rather than imported...
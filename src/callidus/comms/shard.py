@@ -0,0 +1,761 @@
+#!/usr/bin/env python3
+'''
+Shard - Consumer sharded by session ID using consistent hashing
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# Shared variables, constants, etc
+
+# System Modules
+import bisect
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import pika
+from appcore.conversion import ENCODE_METHOD
+
+# Local app modules
+from callidus.comms.batch import BATCH_MESSAGE_TYPE, unpack
+from callidus.comms.message import CallidusMessage
+
+# Imports for python variable type hints
+from typing import Any, Callable, Dict, List, Tuple
+from callidus.include.buffer import Buffer
+
+
+###########################################################################
+#
+# Module Specific Items
+#
+###########################################################################
+#
+# Types
+#
+# Called with the exception and the message (if known) when handling fails
+ErrorHandler = Callable[[Exception, Any], Any]
+
+#
+# Constants
+#
+# Number of points on the ring for each worker
+DEFAULT_REPLICAS = 100
+
+# Maximum number of messages queued for each worker
+DEFAULT_MAX_QUEUE = 1000
+
+# How long to wait before retrying a message for a full queue (seconds)
+_RETRY_INTERVAL = 0.001
+
+#
+# Global Variables
+#
+_LOGGER = logging.getLogger(__name__)
+
+
+###########################################################################
+#
+# ConsistentHashRing Class Definition
+#
+###########################################################################
+class ConsistentHashRing():
+    '''
+    Class to describe ConsistentHashRing - Maps keys onto nodes.
+
+    Each node is placed on the ring at a number of points (replicas), and a
+    key belongs to the node at the next point on the ring.  Adding or
+    removing a node only moves the keys between that node and its
+    neighbours (about 1/N of the keys).
+
+    Attributes:
+        replicas (int) [ReadOnly]: Number of points on the ring for each node
+        nodes (list) [ReadOnly]: The nodes on the ring
+    '''
+
+    #
+    # __init__
+    #
+    def __init__(
+            self,
+            replicas: int = DEFAULT_REPLICAS
+    ):
+        '''
+        Initialises the instance.
+
+        Args:
+            replicas (int): Number of points on the ring for each node
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        # Private Attributes
+        self.__replicas = max(replicas, 1)
+        self.__points: List[int] = []
+        self.__owners: Dict[int, str] = {}
+        self.__nodes: List[str] = []
+
+        # Attributes
+
+
+    ###########################################################################
+    #
+    # Properties
+    #
+    ###########################################################################
+    #
+    # replicas
+    #
+    @property
+    def replicas(self) -> int:
+        ''' Number of points on the ring for each node '''
+        return self.__replicas
+
+
+    #
+    # nodes
+    #
+    @property
+    def nodes(self) -> List[str]:
+        ''' The nodes on the ring '''
+        return list(self.__nodes)
+
+
+    ###########################################################################
+    #
+    # Functions
+    #
+    ###########################################################################
+    #
+    # _hash
+    #
+    def _hash(self, key: str = "") -> int:
+        ''' Hash a key to a point on the ring '''
+        return int.from_bytes(
+            hashlib.blake2b(key.encode(ENCODE_METHOD), digest_size=8).digest(),
+            "big"
+        )
+
+
+    #
+    # add
+    #
+    def add(self, node: str = "") -> None:
+        '''
+        Add a node to the ring
+
+        Args:
+            node (str): The node to add
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        if node in self.__nodes:
+            return
+
+        self.__nodes.append(node)
+        for _replica in range(self.__replicas):
+            _point = self._hash(f"{node}#{_replica}")
+            if _point in self.__owners: continue
+
+            self.__owners[_point] = node
+            bisect.insort(self.__points, _point)
+
+
+    #
+    # remove
+    #
+    def remove(self, node: str = "") -> None:
+        '''
+        Remove a node from the ring
+
+        Args:
+            node (str): The node to remove
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        if node not in self.__nodes:
+            return
+
+        self.__nodes.remove(node)
+        self.__points = [
+            _point for _point in self.__points
+            if self.__owners[_point] != node
+        ]
+        self.__owners = {
+            _point: _owner for _point, _owner in self.__owners.items()
+            if _owner != node
+        }
+
+
+    #
+    # get
+    #
+    def get(self, key: str = "") -> str | None:
+        '''
+        Find the node a key belongs to
+
+        Args:
+            key (str): The key to look up
+
+        Returns:
+            str | None: The node, or None if there are no nodes on the ring
+
+        Raises:
+            None
+        '''
+        if not self.__points:
+            return None
+
+        _index = bisect.bisect(self.__points, self._hash(key))
+        if _index == len(self.__points): _index = 0
+
+        return self.__owners[self.__points[_index]]
+
+
+###########################################################################
+#
+# ShardedConsumer Class Definition
+#
+###########################################################################
+class ShardedConsumer():
+    '''
+    Class to describe ShardedConsumer - Runs a handler across many workers.
+
+    Messages are assigned to a worker by consistent hashing of the session
+    ID (the RMQ correlation_id), and each worker handles its messages in the
+    order they were dispatched, so messages for a session stay in order.
+    Messages without a session ID have no ordering requirement and are
+    spread across the workers.
+
+    Workers may be threads or processes.  When using processes the handler
+    (and error handler) must be picklable (eg a module level function).
+    An exception raised by the handler is passed to the error handler (or
+    logged if there is no error handler) and the worker keeps running.
+
+    When workers are added or removed, the queued messages are completed
+    before any sessions move, so ordering is kept while rebalancing.  As this
+    waits for the workers, a handler cannot add or remove workers or stop
+    the consumer (RuntimeError is raised).  A handler may dispatch messages,
+    but will wait while the target worker's queue is full (so must not
+    dispatch to its own session).
+
+    Attributes:
+        handler (Callable): Called with each CallidusMessage
+        on_error (Callable): Called with the exception and the message when
+            the handler fails (None = log the exception)
+        use_processes (bool) [ReadOnly]: True if workers are processes
+        workers (list) [ReadOnly]: Names of the running workers
+    '''
+
+    #
+    # __init__
+    #
+    def __init__(
+            self,
+            handler: Callable[[CallidusMessage], Any] | None = None,
+            workers: int = 0,
+            use_processes: bool = False,
+            replicas: int = DEFAULT_REPLICAS,
+            max_queue: int = DEFAULT_MAX_QUEUE,
+            on_error: ErrorHandler | None = None
+    ):
+        '''
+        Initialises the instance.
+
+        Args:
+            handler (Callable): Called with each CallidusMessage
+            workers (int): Number of workers to start with
+                (0 = number of CPUs)
+            use_processes (bool): Run workers as processes rather than threads
+            replicas (int): Number of points on the hash ring for each worker
+            max_queue (int): Maximum number of messages queued for a worker
+            on_error (Callable): Called with the exception and the message
+                when the handler fails (None = log the exception)
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        # Private Attributes
+        self.__lock = threading.RLock()
+        self.__ring = ConsistentHashRing(replicas=replicas)
+        self.__workers: Dict[str, Tuple[Any, Any]] = {}
+        self.__counter = itertools.count()
+        self.__round_robin = itertools.count()
+        self.__use_processes = use_processes
+        self.__max_queue = max_queue
+        self.__initial_workers = workers or os.cpu_count() or 1
+        self.__rebalancing = False
+        self.__rebalanced = threading.Condition(self.__lock)
+        self.__deferred: List[Tuple[CallidusMessage, int]] = []
+
+        # Attributes
+        self.handler = handler
+        self.on_error = on_error
+
+
+    ###########################################################################
+    #
+    # Properties
+    #
+    ###########################################################################
+    #
+    # use_processes
+    #
+    @property
+    def use_processes(self) -> bool:
+        ''' True if workers are processes '''
+        return self.__use_processes
+
+
+    #
+    # workers
+    #
+    @property
+    def workers(self) -> List[str]:
+        ''' Names of the running workers '''
+        with self.__lock:
+            return self.__ring.nodes
+
+
+    ###########################################################################
+    #
+    # Functions
+    #
+    ###########################################################################
+    #
+    # _is_worker
+    #
+    def _is_worker(self) -> bool:
+        ''' Determine if the current thread is a worker (lock must be held) '''
+        _current = threading.current_thread()
+        return any(
+            _worker is _current for _, _worker in self.__workers.values()
+        )
+
+
+    #
+    # _check_not_worker
+    #
+    def _check_not_worker(self) -> None:
+        ''' Prevent a worker waiting for its own queue to be handled '''
+        with self.__lock:
+            if self._is_worker():
+                raise RuntimeError("Workers cannot be changed from a handler")
+
+
+    #
+    # _queue_for
+    #
+    def _queue_for(
+            self,
+            message: CallidusMessage,
+            round_robin: int = 0
+    ) -> Any:
+        ''' Find the queue for a message (lock must be held) '''
+        if message.session_id:
+            _name = self.__ring.get(message.session_id)
+        else:
+            _nodes = self.__ring.nodes
+            _name = _nodes[round_robin % len(_nodes)] if _nodes else None
+
+        if not _name:
+            raise RuntimeError("No workers are running")
+
+        return self.__workers[_name][0]
+
+
+    #
+    # _rebalance
+    #
+    def _rebalance(self, change: Callable[[], None]) -> None:
+        '''
+        Change the workers once all queued messages have been handled
+
+        While rebalancing, messages dispatched by handlers are held back and
+        other dispatchers wait.  The lock is not held while waiting for the
+        queues, so handlers are never blocked.  The held back messages are
+        queued (in order) using the new hash ring, or passed to the error
+        handler if there are no workers left.
+        '''
+        self._check_not_worker()
+
+        with self.__lock:
+            while self.__rebalancing:
+                self.__rebalanced.wait()
+
+            self.__rebalancing = True
+            _queues = [_queue for _queue, _ in self.__workers.values()]
+
+        try:
+            # Sessions that move must not overtake messages already queued
+            # for their old worker
+            for _queue in _queues:
+                _queue.join()
+
+            with self.__lock:
+                change()
+
+            while True:
+                with self.__lock:
+                    if not self.__deferred:
+                        break
+
+                    _message, _round_robin = self.__deferred.pop(0)
+                    try:
+                        _queue = self._queue_for(_message, _round_robin)
+
+                    except RuntimeError as err:
+                        _queue = None
+                        _error = err
+
+                if _queue is None:
+                    _report_error(name="rebalance", on_error=self.on_error,
+                                  err=_error, message=_message)
+                    continue
+
+                _queue.put(_message)
+
+        finally:
+            with self.__lock:
+                self.__rebalancing = False
+                self.__rebalanced.notify_all()
+
+
+    #
+    # start
+    #
+    def start(self) -> None:
+        '''
+        Start the initial workers
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        with self.__lock:
+            if self.__workers:
+                return
+
+        for _ in range(self.__initial_workers):
+            self.add_worker()
+
+
+    #
+    # stop
+    #
+    def stop(self) -> None:
+        '''
+        Handle all queued messages, then stop the workers
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Raises:
+            RuntimeError
+                When called from a worker
+        '''
+        for _name in self.workers:
+            self.remove_worker(name=_name)
+
+
+    #
+    # add_worker
+    #
+    def add_worker(self) -> str:
+        '''
+        Start a worker and add it to the hash ring
+
+        Args:
+            None
+
+        Returns:
+            str: The name of the worker
+
+        Raises:
+            RuntimeError
+                When called from a worker
+        '''
+        _name = f"worker-{next(self.__counter)}"
+
+        if self.__use_processes:
+            _queue = multiprocessing.JoinableQueue(maxsize=self.__max_queue)
+            _worker = multiprocessing.Process(
+                target=_worker_loop,
+                args=(_name, self.handler, self.on_error, _queue),
+                name=_name,
+                daemon=True
+            )
+        else:
+            _queue = queue.Queue(maxsize=self.__max_queue)
+            _worker = threading.Thread(
+                target=_worker_loop,
+                args=(_name, self.handler, self.on_error, _queue),
+                name=_name,
+                daemon=True
+            )
+
+        def _add() -> None:
+            self.__workers[_name] = (_queue, _worker)
+            self.__ring.add(_name)
+
+        self._check_not_worker()
+        _worker.start()
+        self._rebalance(change=_add)
+
+        return _name
+
+
+    #
+    # remove_worker
+    #
+    def remove_worker(self, name: str = "") -> None:
+        '''
+        Remove a worker from the hash ring and stop it
+
+        Args:
+            name (str): The name of the worker
+
+        Returns:
+            None
+
+        Raises:
+            RuntimeError
+                When called from a worker
+        '''
+        _removed = []
+
+        def _remove() -> None:
+            if name not in self.__workers:
+                return
+
+            self.__ring.remove(name)
+            _removed.append(self.__workers.pop(name))
+
+        try:
+            self._rebalance(change=_remove)
+
+        finally:
+            # Always stop a worker once it is off the ring
+            for _queue, _worker in _removed:
+                _queue.put(None)
+                _worker.join()
+
+
+    #
+    # dispatch
+    #
+    def dispatch(self, message: CallidusMessage | None = None) -> None:
+        '''
+        Queue a message for the worker handling its session
+
+        Waits while the worker's queue is full, or while workers are being
+        added or removed (a handler's message is held back instead).
+
+        Args:
+            message (CallidusMessage): The message to handle
+
+        Returns:
+            None
+
+        Raises:
+            RuntimeError
+                When there are no workers running
+            TypeError
+                When the session ID is not a string
+        '''
+        if not isinstance(message, CallidusMessage):
+            return
+
+        if message.session_id is not None and \
+                not isinstance(message.session_id, str):
+            raise TypeError("Session ID must be a string")
+
+        _round_robin = 0 if message.session_id else next(self.__round_robin)
+
+        while True:
+            with self.__lock:
+                if self.__rebalancing:
+                    if self._is_worker():
+                        self.__deferred.append((message, _round_robin))
+                        return
+
+                    self.__rebalanced.wait()
+                    continue
+
+                # Queue while holding the lock so a rebalance cannot start
+                # between choosing the worker and queueing the message, but
+                # never wait for space while holding it
+                try:
+                    self._queue_for(message, _round_robin).put_nowait(message)
+                    return
+
+                except queue.Full:
+                    pass
+
+            time.sleep(_RETRY_INTERVAL)
+
+
+    #
+    # dispatch_rmq
+    #
+    def dispatch_rmq(
+            self,
+            properties: pika.BasicProperties | None = None,
+            body: Buffer = b""
+    ) -> int:
+        '''
+        Build the messages from a received RMQ message and queue them
+
+        A batch envelope is split into its messages, with each message
+        queued according to its own session ID.  A body that cannot be
+        decoded, or a message with an invalid session ID, is passed to the
+        error handler (or logged).
+
+        Args:
+            properties (pika.BasicProperties): The RMQ message properties
+            body (Buffer): The RMQ message body (a Callidus message packet or
+                a batch packet)
+
+        Returns:
+            int: The number of messages queued
+
+        Raises:
+            RuntimeError
+                When there are no workers running
+        '''
+        try:
+            if isinstance(properties, pika.BasicProperties) and \
+                    properties.type == BATCH_MESSAGE_TYPE:
+                _messages = unpack(packet=body)
+
+            else:
+                _message = CallidusMessage()
+                _message.rmq_properties = properties
+                _message.packet = body
+                _messages = [_message]
+
+        except (ValueError, TypeError, RecursionError) as err:
+            _report_error(name="dispatch_rmq", on_error=self.on_error, err=err)
+            return 0
+
+        _count = 0
+        for _message in _messages:
+            try:
+                self.dispatch(message=_message)
+                _count += 1
+
+            except TypeError as err:
+                _report_error(name="dispatch_rmq", on_error=self.on_error,
+                              err=err, message=_message)
+
+        return _count
+
+
+###########################################################################
+#
+# Functions
+#
+###########################################################################
+#
+# _worker_loop
+#
+def _worker_loop(
+        name: str = "",
+        handler: Callable[[CallidusMessage], Any] | None = None,
+        on_error: ErrorHandler | None = None,
+        work_queue: Any = None
+) -> None:
+    ''' Handle messages from a queue until None is received '''
+    while True:
+        _message = work_queue.get()
+        try:
+            if _message is None:
+                break
+
+            if handler: handler(_message)
+
+        except Exception as err:
+            _report_error(name=name, on_error=on_error, err=err,
+                          message=_message)
+
+        finally:
+            work_queue.task_done()
+
+
+#
+# _report_error
+#
+def _report_error(
+        name: str = "",
+        on_error: ErrorHandler | None = None,
+        err: Exception | None = None,
+        message: CallidusMessage | None = None
+) -> None:
+    ''' Pass an error to the error handler, or log it '''
+    if on_error:
+        try:
+            on_error(err, message)
+            return
+
+        except Exception:
+            _LOGGER.exception("%s: error handler failed", name)
+
+    _session_id = getattr(message, "session_id", "")
+    _LOGGER.error(
+        "%s: failed to handle message (session '%s'): %s",
+        name, _session_id, err, exc_info=err
+    )
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
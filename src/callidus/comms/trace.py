@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+'''
+Trace - Latency histograms built from message hop traces
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# Shared variables, constants, etc
+
+# System Modules
+import threading
+from collections import OrderedDict
+
+# Local app modules
+from callidus.comms.message import CallidusMessage
+from callidus.include.typing import MessagePort
+
+# Imports for python variable type hints
+from typing import Dict, List, Tuple
+
+
+###########################################################################
+#
+# Module Specific Items
+#
+###########################################################################
+#
+# Types
+#
+# Key for a histogram - (from, to, receiver port)
+TraceKey = Tuple[str, str, MessagePort]
+
+#
+# Constants
+#
+# Number of bits of precision within each power of 2 (5 = ~3% error)
+DEFAULT_PRECISION_BITS = 5
+
+# Largest latency tracked (microseconds) - larger values are clamped
+DEFAULT_MAX_LATENCY = 3600 * 1000000
+
+# Maximum number of histograms kept by a collector
+DEFAULT_MAX_KEYS = 1024
+
+#
+# Global Variables
+#
+
+
+###########################################################################
+#
+# LatencyHistogram Class Definition
+#
+###########################################################################
+class LatencyHistogram():
+    '''
+    Class to describe LatencyHistogram - A log bucketed latency histogram.
+
+    Values are counted in buckets that double in width for each power of 2,
+    with each power of 2 divided into linear sub-buckets (as in an HDR
+    histogram).  Memory use is fixed by the precision and maximum value,
+    regardless of the number of values recorded.
+
+    Attributes:
+        count (int) [ReadOnly]: Number of values recorded
+        min (int) [ReadOnly]: Smallest value recorded
+        max (int) [ReadOnly]: Largest value recorded
+        mean (float) [ReadOnly]: Mean of the values recorded
+    '''
+
+    #
+    # __init__
+    #
+    def __init__(
+            self,
+            precision_bits: int = DEFAULT_PRECISION_BITS,
+            max_value: int = DEFAULT_MAX_LATENCY
+    ):
+        '''
+        Initialises the instance.
+
+        Args:
+            precision_bits (int): Number of bits of precision within each
+                power of 2
+            max_value (int): Largest value tracked (larger values are
+                counted as the max value)
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        # Private Attributes
+        self.__sub_bucket_count = 1 << precision_bits
+        self.__precision_bits = precision_bits
+        self.__max_value = max_value
+        self.__counts = [0] * (self._bucket_index(max_value) + 1)
+        self.__count = 0
+        self.__total = 0
+        self.__min = 0
+        self.__max = 0
+
+        # Attributes
+
+
+    ###########################################################################
+    #
+    # Properties
+    #
+    ###########################################################################
+    #
+    # count
+    #
+    @property
+    def count(self) -> int:
+        ''' Number of values recorded '''
+        return self.__count
+
+
+    #
+    # min
+    #
+    @property
+    def min(self) -> int:
+        ''' Smallest value recorded '''
+        return self.__min
+
+
+    #
+    # max
+    #
+    @property
+    def max(self) -> int:
+        ''' Largest value recorded '''
+        return self.__max
+
+
+    #
+    # mean
+    #
+    @property
+    def mean(self) -> float:
+        ''' Mean of the values recorded '''
+        if not self.__count: return 0.0
+        return self.__total / self.__count
+
+
+    ###########################################################################
+    #
+    # Functions
+    #
+    ###########################################################################
+    #
+    # _bucket_index
+    #
+    def _bucket_index(self, value: int = 0) -> int:
+        ''' Determine the bucket a value is counted in '''
+        if value < (self.__sub_bucket_count << 1):
+            return value
+
+        _shift = value.bit_length() - self.__precision_bits - 1
+        return (_shift * self.__sub_bucket_count) + (value >> _shift)
+
+
+    #
+    # _bucket_high
+    #
+    def _bucket_high(self, index: int = 0) -> int:
+        ''' Determine the highest value counted in a bucket '''
+        if index < (self.__sub_bucket_count << 1):
+            return index
+
+        _shift = (index // self.__sub_bucket_count) - 1
+        _mantissa = index - (_shift * self.__sub_bucket_count)
+        return ((_mantissa + 1) << _shift) - 1
+
+
+    #
+    # record
+    #
+    def record(self, value: int = 0, count: int = 1) -> None:
+        '''
+        Record a value
+
+        Args:
+            value (int): The value to record (negative values count as 0)
+            count (int): The number of times to record the value
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        _value = min(max(int(value), 0), self.__max_value)
+
+        self.__counts[self._bucket_index(_value)] += count
+        if not self.__count or _value < self.__min: self.__min = _value
+        if _value > self.__max: self.__max = _value
+        self.__count += count
+        self.__total += _value * count
+
+
+    #
+    # percentile
+    #
+    def percentile(self, percentile: float = 50.0) -> int:
+        '''
+        Determine the value at a percentile
+
+        Args:
+            percentile (float): The percentile (0 - 100)
+
+        Returns:
+            int: The value at the percentile (within the histogram precision)
+
+        Raises:
+            None
+        '''
+        if not self.__count: return 0
+
+        _target = max(1, -(-self.__count * percentile // 100))
+        _seen = 0
+        for _index, _bucket_count in enumerate(self.__counts):
+            _seen += _bucket_count
+            if _seen >= _target:
+                return min(self._bucket_high(_index), self.__max)
+
+        return self.__max
+
+
+    #
+    # merge
+    #
+    def merge(self, other: LatencyHistogram | None = None) -> None:
+        '''
+        Add the values recorded in another histogram to this histogram
+
+        Args:
+            other (LatencyHistogram): The histogram to merge (must have
+                the same precision and max value)
+
+        Returns:
+            None
+
+        Raises:
+            ValueError
+                When the histograms have different layouts
+        '''
+        if not isinstance(other, LatencyHistogram) or not other.count:
+            return
+
+        if len(other.__counts) != len(self.__counts) or \
+                    other.__precision_bits != self.__precision_bits:
+            raise ValueError("Histograms have different layouts")
+
+        for _index, _bucket_count in enumerate(other.__counts):
+            if _bucket_count: self.__counts[_index] += _bucket_count
+
+        if not self.__count or other.__min < self.__min:
+            self.__min = other.__min
+        if other.__max > self.__max: self.__max = other.__max
+        self.__count += other.__count
+        self.__total += other.__total
+
+
+    #
+    # reset
+    #
+    def reset(self) -> None:
+        '''
+        Clear all recorded values
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        self.__counts = [0] * len(self.__counts)
+        self.__count = 0
+        self.__total = 0
+        self.__min = 0
+        self.__max = 0
+
+
+###########################################################################
+#
+# LatencyCollector Class Definition
+#
+###########################################################################
+class LatencyCollector():
+    '''
+    Class to describe LatencyCollector - Latency histograms from traces.
+
+    Each traced message received is broken into the hops it passed through,
+    and the latency of each hop is recorded in a histogram for the
+    (from node, to node, receiver port).  The end to end latency is recorded
+    in a histogram for the (sender, receiver, receiver port).
+
+    The number of histograms is bounded - the least recently updated
+    histogram is discarded when the limit is reached.
+
+    Latency is calculated from the clocks of the nodes in the trace, so is
+    only as accurate as the clock synchronisation between the nodes.
+
+    Attributes:
+        max_keys (int): Maximum number of histograms kept (for each of the
+            hop and end to end histograms)
+        hops (dict) [ReadOnly]: Snapshot of the histograms for each hop
+        paths (dict) [ReadOnly]: Snapshot of the end to end histograms
+    '''
+
+    #
+    # __init__
+    #
+    def __init__(
+            self,
+            max_keys: int = DEFAULT_MAX_KEYS,
+            precision_bits: int = DEFAULT_PRECISION_BITS,
+            max_latency: int = DEFAULT_MAX_LATENCY
+    ):
+        '''
+        Initialises the instance.
+
+        Args:
+            max_keys (int): Maximum number of histograms kept
+            precision_bits (int): Number of bits of precision within each
+                power of 2 for the histograms
+            max_latency (int): Largest latency tracked (microseconds)
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        # Private Attributes
+        self.__lock = threading.Lock()
+        self.__hops: OrderedDict[TraceKey, LatencyHistogram] = OrderedDict()
+        self.__paths: OrderedDict[TraceKey, LatencyHistogram] = OrderedDict()
+        self.__precision_bits = precision_bits
+        self.__max_latency = max_latency
+
+        # Attributes
+        self.max_keys = max_keys
+
+
+    ###########################################################################
+    #
+    # Properties
+    #
+    ###########################################################################
+    #
+    # hops
+    #
+    @property
+    def hops(self) -> Dict[TraceKey, LatencyHistogram]:
+        ''' Snapshot of the histograms for each hop '''
+        with self.__lock:
+            return dict(self.__hops)
+
+
+    #
+    # paths
+    #
+    @property
+    def paths(self) -> Dict[TraceKey, LatencyHistogram]:
+        ''' Snapshot of the end to end histograms '''
+        with self.__lock:
+            return dict(self.__paths)
+
+
+    ###########################################################################
+    #
+    # Functions
+    #
+    ###########################################################################
+    #
+    # _histogram
+    #
+    def _histogram(
+            self,
+            histograms: OrderedDict[TraceKey, LatencyHistogram],
+            key: TraceKey
+    ) -> LatencyHistogram:
+        ''' Get the histogram for a key, creating it if required '''
+        _histogram = histograms.get(key)
+        if _histogram:
+            histograms.move_to_end(key)
+            return _histogram
+
+        _histogram = LatencyHistogram(
+            precision_bits=self.__precision_bits,
+            max_value=self.__max_latency
+        )
+        histograms[key] = _histogram
+
+        while len(histograms) > self.max_keys:
+            histograms.popitem(last=False)
+
+        return _histogram
+
+
+    #
+    # record
+    #
+    def record(self, message: CallidusMessage | None = None) -> None:
+        '''
+        Record the latency of each hop in the trace of a message
+
+        The receiver should add its own hop to the message before recording
+        it, so the final hop is included.
+
+        Args:
+            message (CallidusMessage): The message received
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        if not isinstance(message, CallidusMessage) or len(message.trace) < 2:
+            return
+
+        _trace = message.trace
+        _port = message.receiver_port
+
+        with self.__lock:
+            for _index in range(1, len(_trace)):
+                _from_node, _from_time = _trace[_index - 1]
+                _to_node, _to_time = _trace[_index]
+                self._histogram(
+                    self.__hops, (_from_node, _to_node, _port)
+                ).record(_to_time - _from_time)
+
+            self._histogram(
+                self.__paths, (message.sender, message.receiver, _port)
+            ).record(_trace[-1][1] - _trace[0][1])
+
+
+    #
+    # slowest_hops
+    #
+    def slowest_hops(
+            self,
+            percentile: float = 99.0,
+            limit: int = 5
+    ) -> List[Tuple[TraceKey, int]]:
+        '''
+        Determine the hops with the highest latency at a percentile
+
+        Args:
+            percentile (float): The percentile to compare (0 - 100)
+            limit (int): Maximum number of hops to return
+
+        Returns:
+            list: Tuples of (hop key, latency in microseconds), slowest first
+
+        Raises:
+            None
+        '''
+        with self.__lock:
+            _latency = [
+                (_key, _histogram.percentile(percentile))
+                for _key, _histogram in self.__hops.items()
+            ]
+
+        _latency.sort(key=lambda _item: _item[1], reverse=True)
+        return _latency[:limit]
+
+
+    #
+    # reset
+    #
+    def reset(self) -> None:
+        '''
+        Discard all histograms
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        with self.__lock:
+            self.__hops.clear()
+            self.__paths.clear()
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+'''
+Validation - Ingress validation of requests before they are dispatched
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# Shared variables, constants, etc
+
+# System Modules
+
+# Local app modules
+from callidus.include.buffer import as_buffer
+from callidus.comms.request import Request, MAX_PACKET_SIZE
+from callidus.comms.response import Response
+from callidus.include.typing import Status, RequestType
+
+# Imports for python variable type hints
+from typing import Any, Callable, Dict, Tuple
+from callidus.include.buffer import Buffer
+
+
+###########################################################################
+#
+# Module Specific Items
+#
+###########################################################################
+#
+# Types
+#
+# A compiled validator returns an empty string if the value is valid,
+# otherwise a description of the problem
+Validator = Callable[[Any], str]
+
+#
+# Constants
+#
+# Suffix on a key in a dict schema to mark the key as optional
+OPTIONAL_SUFFIX = "?"
+
+# Types that may appear in a schema
+_SCHEMA_TYPES = (str, int, float, bool, dict, list, type(None))
+
+#
+# Global Variables
+#
+
+
+###########################################################################
+#
+# Schema Compilation
+#
+###########################################################################
+#
+# compile_schema
+#
+def compile_schema(schema: Any = None, path: str = "data") -> Validator:
+    '''
+    Compile a schema into a validator function.
+
+    A schema is described using:
+        None - Any value is accepted
+        A type (str, int, float, bool, dict, list, type(None)) - The value
+            must be an instance of the type (bool is not accepted as an int,
+            int is accepted as a float)
+        A dict - The value must be a dict containing the keys in the schema,
+            with each value matching the schema for the key.  Keys ending in
+            '?' are optional.  Keys not in the schema are rejected.
+        A list containing a single schema - The value must be a list with
+            each item matching the schema
+        A tuple of schemas - The value must match at least one of the schemas
+
+    The schema is only walked once, so the returned function can be called
+    for each request without further interpretation of the schema.
+
+    Args:
+        schema (Any): The schema to compile
+        path (str): Name of the value being validated (used in messages)
+
+    Returns:
+        Validator: Function returning an empty string if the value is valid,
+            otherwise a description of the problem
+
+    Raises:
+        TypeError
+            When the schema is not valid
+    '''
+    if schema is None:
+        return _accept_any
+
+    if isinstance(schema, type):
+        if schema not in _SCHEMA_TYPES:
+            raise TypeError(f"Unsupported type in schema at '{path}': {schema}")
+
+        return _compile_type(schema=schema, path=path)
+
+    if isinstance(schema, dict):
+        return _compile_dict(schema=schema, path=path)
+
+    if isinstance(schema, list):
+        if len(schema) != 1:
+            raise TypeError(
+                f"List schema at '{path}' must contain exactly one item"
+            )
+
+        return _compile_list(schema=schema[0], path=path)
+
+    if isinstance(schema, tuple):
+        if not schema:
+            raise TypeError(f"Tuple schema at '{path}' must not be empty")
+
+        return _compile_any_of(schema=schema, path=path)
+
+    raise TypeError(f"Invalid schema at '{path}': {schema!r}")
+
+
+#
+# _accept_any
+#
+def _accept_any(value: Any = None) -> str:
+    ''' Validator accepting any value '''
+    return ""
+
+
+#
+# _compile_type
+#
+def _compile_type(schema: type = type(None), path: str = "") -> Validator:
+    ''' Compile a type check '''
+    _msg = f"'{path}' must be of type '{schema.__name__}'"
+
+    if schema is int:
+        def _validate(value: Any = None) -> str:
+            if isinstance(value, int) and not isinstance(value, bool):
+                return ""
+            return _msg
+
+    elif schema is float:
+        def _validate(value: Any = None) -> str:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return ""
+            return _msg
+
+    else:
+        def _validate(value: Any = None) -> str:
+            if isinstance(value, schema):
+                return ""
+            return _msg
+
+    return _validate
+
+
+#
+# _compile_dict
+#
+def _compile_dict(schema: dict | None = None, path: str = "") -> Validator:
+    ''' Compile a dict check '''
+    schema = schema or {}
+    _required: Dict[str, Validator] = {}
+    _optional: Dict[str, Validator] = {}
+
+    for _key, _sub_schema in schema.items():
+        if not isinstance(_key, str):
+            raise TypeError(f"Dict schema keys at '{path}' must be strings")
+
+        if _key.endswith(OPTIONAL_SUFFIX):
+            _name = _key[:-len(OPTIONAL_SUFFIX)]
+            _optional[_name] = compile_schema(
+                schema=_sub_schema, path=f"{path}.{_name}"
+            )
+        else:
+            _required[_key] = compile_schema(
+                schema=_sub_schema, path=f"{path}.{_key}"
+            )
+
+    _allowed = set(_required) | set(_optional)
+    _msg = f"'{path}' must be of type 'dict'"
+
+    def _validate(value: Any = None) -> str:
+        if not isinstance(value, dict):
+            return _msg
+
+        for _key, _validator in _required.items():
+            if _key not in value:
+                return f"'{path}.{_key}' is required"
+
+            _error = _validator(value[_key])
+            if _error: return _error
+
+        for _key, _validator in _optional.items():
+            if _key in value:
+                _error = _validator(value[_key])
+                if _error: return _error
+
+        if len(value) > len(_required):
+            for _key in value:
+                if _key not in _allowed:
+                    return f"'{path}.{_key}' is not permitted"
+
+        return ""
+
+    return _validate
+
+
+#
+# _compile_list
+#
+def _compile_list(schema: Any = None, path: str = "") -> Validator:
+    ''' Compile a list check '''
+    _item_validator = compile_schema(schema=schema, path=f"{path}[]")
+    _msg = f"'{path}' must be of type 'list'"
+
+    def _validate(value: Any = None) -> str:
+        if not isinstance(value, list):
+            return _msg
+
+        if _item_validator is _accept_any:
+            return ""
+
+        for _item in value:
+            _error = _item_validator(_item)
+            if _error: return _error
+
+        return ""
+
+    return _validate
+
+
+#
+# _compile_any_of
+#
+def _compile_any_of(schema: tuple = (), path: str = "") -> Validator:
+    ''' Compile a check that must match one of a number of schemas '''
+    _validators = tuple(
+        compile_schema(schema=_sub_schema, path=path) for _sub_schema in schema
+    )
+
+    def _validate(value: Any = None) -> str:
+        _error = ""
+        for _validator in _validators:
+            _error = _validator(value)
+            if not _error: return ""
+
+        return _error
+
+    return _validate
+
+
+###########################################################################
+#
+# RequestValidator Class Definition
+#
+###########################################################################
+class RequestValidator():
+    '''
+    Class to describe RequestValidator - Validation of incoming requests.
+
+    Schemas are registered for each request type/action and compiled once.
+    Incoming packets are checked against the size limit before they are
+    decoded, and the decoded request is checked against the compiled schema
+    before it is dispatched to a handler.
+
+    Attributes:
+        max_packet_size (int): Largest packet (in bytes) that will be decoded
+            (Request will not decode packets larger than MAX_PACKET_SIZE)
+    '''
+
+    #
+    # __init__
+    #
+    def __init__(
+            self,
+            max_packet_size: int = MAX_PACKET_SIZE
+    ):
+        '''
+        Initialises the instance.
+
+        Args:
+            max_packet_size (int): Largest packet (in bytes) that will be
+                decoded
+
+        Returns:
+            None
+
+        Raises:
+            None
+        '''
+        # Private Attributes
+        self.__validators: Dict[Tuple[RequestType, str], Validator] = {}
+
+        # Attributes
+        self.max_packet_size = max_packet_size
+
+
+    ###########################################################################
+    #
+    # Functions
+    #
+    ###########################################################################
+    #
+    # register
+    #
+    def register(
+            self,
+            request_type: RequestType = RequestType.NONE,
+            action: str = "",
+            schema: Any = None
+    ) -> None:
+        '''
+        Register the schema for the data of a request type/action
+
+        Args:
+            request_type (RequestType): The type of request
+            action (str): The action the schema applies to
+            schema (Any): The schema for the request data
+                (See compile_schema for the format)
+
+        Returns:
+            None
+
+        Raises:
+            TypeError
+                When the schema is not valid
+        '''
+        self.__validators[(request_type, action)] = compile_schema(
+            schema=schema,
+            path="data"
+        )
+
+
+    #
+    # validate
+    #
+    def validate(self, request: Request | None = None) -> Response | None:
+        '''
+        Validate a decoded request
+
+        Args:
+            request (Request): The request to validate
+
+        Returns:
+            Response | None: None if the request is valid, otherwise a
+                response describing why the request was rejected
+
+        Raises:
+            None
+        '''
+        if not isinstance(request, Request):
+            return Response(
+                status=Status.EXEC_ERROR,
+                msg="Invalid request"
+            )
+
+        if request.error:
+            return Response(status=Status.EXEC_ERROR, msg=request.error)
+
+        if not isinstance(request.action, str):
+            return Response(
+                status=Status.EXEC_ERROR,
+                msg="Request action must be a string"
+            )
+
+        _validator = self.__validators.get((request.type, request.action))
+        if not _validator:
+            return Response(
+                status=Status.INVALID_ACTION,
+                msg=f"Unknown action '{request.action}' for request type " +
+                    f"'{request.type.value}'"
+            )
+
+        _error = _validator(request.data)
+        if _error:
+            return Response(status=Status.EXEC_ERROR, msg=_error)
+
+        return None
+
+
+    #
+    # ingest
+    #
+    def ingest(
+            self,
+            packet: Buffer = b""
+    ) -> Tuple[Request, Response | None]:
+        '''
+        Check the size of a packet, decode it and validate the request
+
+        Args:
+            packet (Buffer): The request packet as received
+
+        Returns:
+            tuple:
+                Request: The decoded request (empty if not decoded)
+                Response | None: None if the request is valid, otherwise a
+                    response describing why the request was rejected
+
+        Raises:
+            None
+        '''
+        _request = Request()
+
+        _view = as_buffer(packet)
+        if _view is None:
+            return _request, Response(
+                status=Status.EXEC_ERROR,
+                msg="Invalid packet"
+            )
+
+        if _view.nbytes > self.max_packet_size:
+            return _request, Response(
+                status=Status.EXEC_ERROR,
+                msg=f"Packet size ({_view.nbytes}) exceeds limit " +
+                    f"({self.max_packet_size})"
+            )
+
+        _request.packet = _view
+        return _request, self.validate(request=_request)
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
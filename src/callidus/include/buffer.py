@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+'''
+Buffer - Helpers for reading packets from and writing packets to buffers
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# Shared variables, constants, etc
+
+# System Modules
+
+# Local app modules
+
+# Imports for python variable type hints
+from typing import Any, Union
+
+
+###########################################################################
+#
+# Module Specific Items
+#
+###########################################################################
+#
+# Types
+#
+# A packet that can be read
+Buffer = Union[bytes, bytearray, memoryview]
+
+# A buffer that a packet can be written into
+WritableBuffer = Union[bytearray, memoryview]
+
+#
+# Constants
+#
+
+#
+# Global Variables
+#
+
+
+###########################################################################
+#
+# Functions
+#
+###########################################################################
+#
+# as_buffer
+#
+def as_buffer(value: Any = None) -> memoryview | None:
+    '''
+    Get a byte view of a packet without copying it
+
+    Args:
+        value (Any): The packet (bytes, bytearray or memoryview)
+
+    Returns:
+        memoryview | None: A contiguous view of the packet as bytes, or None
+            if the value is not a suitable buffer
+
+    Raises:
+        None
+    '''
+    if not isinstance(value, (bytes, bytearray, memoryview)):
+        return None
+
+    _view = memoryview(value)
+    if not _view.contiguous:
+        return None
+
+    if _view.format != "B" or _view.ndim != 1:
+        _view = _view.cast("B")
+
+    return _view
+
+
+#
+# write_into
+#
+def write_into(
+        buffer: WritableBuffer | None = None,
+        offset: int = 0,
+        data: bytes = b""
+) -> int:
+    '''
+    Write data into a buffer at an offset
+
+    Args:
+        buffer (WritableBuffer): The buffer to write into
+        offset (int): The position in the buffer to start writing at
+        data (bytes): The data to write
+
+    Returns:
+        int: The number of bytes written
+
+    Raises:
+        TypeError
+            When the buffer is not writable
+        ValueError
+            When the data does not fit in the buffer at the offset
+    '''
+    _view = as_buffer(buffer)
+    if _view is None or _view.readonly:
+        raise TypeError("Buffer must be a writable bytearray or memoryview")
+
+    _length = len(data)
+    if offset < 0 or offset + _length > _view.nbytes:
+        raise ValueError(
+            f"Packet ({_length} bytes) does not fit in buffer " +
+            f"({_view.nbytes} bytes) at offset {offset}"
+        )
+
+    _view[offset:offset + _length] = data
+    return _length
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+'''
+Tests for message batching
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# System Modules
+import json
+import random
+import threading
+import time
+import pytest
+
+# Local app modules
+from callidus.comms.batch import MessageBatch, MessageBatcher, unpack
+from callidus.comms.batch import BATCH_MESSAGE_TYPE, MAX_BATCH_SIZE
+from callidus.comms.message import CallidusMessage
+from callidus.include.typing import MessagePort
+
+
+###########################################################################
+#
+# Helpers
+#
+###########################################################################
+def _message(data, receiver: str = "r", session_id: str = "") -> \
+        CallidusMessage:
+    ''' A message to a receiver '''
+    return CallidusMessage(
+        data=data,
+        sender="s",
+        sender_port=MessagePort.REMOTE,
+        receiver=receiver,
+        receiver_port=MessagePort.ZMQ,
+        session_id=session_id,
+        timestamp=1000
+    )
+
+
+###########################################################################
+#
+# MessageBatch
+#
+###########################################################################
+def test_batch_round_trip():
+    _messages = [
+        _message(data={ "n": _index }, session_id=f"s{_index % 2}")
+        for _index in range(5)
+    ]
+    _messages[3].add_hop("node")
+
+    _received = unpack(MessageBatch(messages=_messages).packet)
+    assert len(_received) == 5
+    for _sent, _got in zip(_messages, _received):
+        assert _got.data == _sent.data
+        assert _got.session_id == _sent.session_id
+        assert _got.receiver == "r"
+        assert _got.receiver_port == MessagePort.ZMQ
+        assert _got.timestamp == 1000
+        assert _got.trace == _sent.trace
+
+
+def test_batch_shares_common_properties():
+    _messages = [_message(data=_index, session_id=f"s{_index}")
+                 for _index in range(3)]
+    _decoded = json.loads(MessageBatch(messages=_messages).packet)
+
+    assert _decoded["properties"]["receiver"] == "r"
+    assert "session_id" not in _decoded["properties"]
+    for _entry in _decoded["batch"]:
+        assert "receiver" not in _entry.get("properties", {})
+        assert "session_id" in _entry["properties"]
+
+
+def test_batch_from_buffer():
+    _packet = MessageBatch(messages=[_message(data=1), _message(data=2)]).packet
+    _received = unpack(memoryview(bytearray(_packet)))
+    assert [_item.data for _item in _received] == [1, 2]
+
+
+def test_unpack_single_message():
+    _received = unpack(_message(data="one", session_id="x").packet)
+    assert len(_received) == 1
+    assert _received[0].data == "one"
+    assert _received[0].session_id == "x"
+
+
+def test_empty_batch():
+    assert unpack(MessageBatch().packet) == []
+
+
+@pytest.mark.parametrize("packet", [
+    json.dumps({ "batch": [1, "x", None] }).encode(),
+    json.dumps([1, 2]).encode(),
+    json.dumps({ "batch": [], "properties": "x" }).encode(),
+])
+def test_unpack_skips_invalid_entries(packet):
+    assert unpack(packet) == []
+
+
+def test_unpack_invalid_json():
+    with pytest.raises(ValueError):
+        unpack(b"{not json")
+
+
+def test_unpack_oversize():
+    with pytest.raises(ValueError):
+        unpack(b" " * (MAX_BATCH_SIZE + 1))
+
+
+def test_batch_rmq_properties():
+    _properties = MessageBatch(
+        messages=[_message(data=1), _message(data=2)]
+    ).rmq_properties
+
+    assert _properties.type == BATCH_MESSAGE_TYPE
+    assert _properties.headers["batch_size"] == 2
+    assert _properties.headers["receiver"] == "r"
+
+
+###########################################################################
+#
+# MessageBatcher
+#
+###########################################################################
+def test_batcher_max_messages():
+    _sent = []
+    _batcher = MessageBatcher(publish=_sent.append, max_messages=3, linger=60)
+
+    assert _batcher.add(_message(data=1)) == 0
+    assert _batcher.add(_message(data=2)) == 0
+    assert _batcher.add(_message(data=3)) == 1
+    assert [_item.data for _item in _sent[0].messages] == [1, 2, 3]
+    assert _batcher.pending == 0
+
+
+def test_batcher_max_bytes():
+    _sent = []
+    _batcher = MessageBatcher(
+        publish=_sent.append, max_messages=100, max_bytes=20, linger=60
+    )
+
+    _batcher.add(_message(data="x" * 8))
+    assert not _sent
+    _batcher.add(_message(data="x" * 8))
+    assert len(_sent) == 1
+
+
+def test_batcher_groups_by_receiver():
+    _sent = []
+    _batcher = MessageBatcher(publish=_sent.append, max_messages=2, linger=60)
+
+    _batcher.add(_message(data=1, receiver="a"))
+    _batcher.add(_message(data=2, receiver="b"))
+    assert _batcher.pending == 2
+
+    _batcher.add(_message(data=3, receiver="a"))
+    assert [_item.data for _item in _sent[0].messages] == [1, 3]
+
+    assert _batcher.flush() == 1
+    assert [_item.data for _item in _sent[1].messages] == [2]
+    assert _batcher.pending == 0
+
+
+def test_batcher_linger():
+    _sent = []
+    _batcher = MessageBatcher(
+        publish=_sent.append, max_messages=100, linger=0.05
+    )
+
+    _batcher.add(_message(data=1))
+    assert _batcher.poll() == 0
+
+    time.sleep(0.06)
+    assert _batcher.poll() == 1
+    assert _batcher.poll() == 0
+
+
+def test_batcher_ignores_non_messages():
+    _batcher = MessageBatcher(publish=lambda _batch: None)
+    assert _batcher.add(None) == 0
+    assert _batcher.pending == 0
+
+
+def test_batcher_order_across_threads():
+    _sent = []
+
+    _random = random.Random(1)
+
+    def _publish(batch: MessageBatch) -> None:
+        # Vary the time between taking and publishing a batch
+        time.sleep(_random.random() * 0.002)
+        _sent.append(batch)
+
+    _batcher = MessageBatcher(publish=_publish, max_messages=3, linger=60)
+
+    def _producer(name: str) -> None:
+        for _index in range(200):
+            _batcher.add(_message(data=[name, _index]))
+
+            # Let the other producers add to the same group
+            time.sleep(0)
+
+    _threads = [
+        threading.Thread(target=_producer, args=(f"p{_index}",))
+        for _index in range(4)
+    ]
+    for _thread in _threads: _thread.start()
+    for _thread in _threads: _thread.join()
+    _batcher.flush()
+
+    # Each producer's messages are received in the order they were added
+    _received = {}
+    for _batch in _sent:
+        for _item in _batch.messages:
+            _received.setdefault(_item.data[0], []).append(_item.data[1])
+
+    assert len(_received) == 4
+    for _indexes in _received.values():
+        assert _indexes == list(range(200))
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+'''
+Tests for buffer packet decoding and encoding
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# System Modules
+import array
+import pytest
+
+# Local app modules
+from callidus.comms.message import CallidusMessage
+from callidus.comms.request import Request
+from callidus.comms.response import Response
+from callidus.include.buffer import as_buffer, write_into
+from callidus.include.typing import RequestType, Status
+
+
+###########################################################################
+#
+# as_buffer / write_into
+#
+###########################################################################
+@pytest.mark.parametrize("value", [b"abc", bytearray(b"abc"),
+                                   memoryview(b"abc")])
+def test_as_buffer(value):
+    _view = as_buffer(value)
+    assert _view.format == "B"
+    assert bytes(_view) == b"abc"
+
+
+def test_as_buffer_casts_to_bytes():
+    _view = as_buffer(memoryview(array.array("H", [1, 2])))
+    assert _view.format == "B"
+    assert _view.nbytes == 4
+
+
+@pytest.mark.parametrize("value", [None, "abc", 5, [1, 2],
+                                   memoryview(b"abcdef")[::2]])
+def test_as_buffer_invalid(value):
+    assert as_buffer(value) is None
+
+
+def test_write_into():
+    _buffer = bytearray(8)
+    assert write_into(buffer=_buffer, offset=2, data=b"abc") == 3
+    assert _buffer == b"\x00\x00abc\x00\x00\x00"
+
+
+@pytest.mark.parametrize("offset, data", [(-1, b"a"), (6, b"abc"),
+                                          (0, b"a" * 9)])
+def test_write_into_does_not_fit(offset, data):
+    _buffer = bytearray(8)
+    with pytest.raises(ValueError):
+        write_into(buffer=_buffer, offset=offset, data=data)
+
+    assert _buffer == bytearray(8)
+
+
+@pytest.mark.parametrize("buffer", [b"12345678", memoryview(b"12345678"),
+                                    None])
+def test_write_into_read_only(buffer):
+    with pytest.raises(TypeError):
+        write_into(buffer=buffer, offset=0, data=b"a")
+
+
+###########################################################################
+#
+# Packets
+#
+###########################################################################
+def test_message_from_buffer():
+    _message = CallidusMessage(data={ "a": [1, 2] }, session_id="s1")
+    _buffer = bytearray(b"xx") + bytearray(_message.packet)
+
+    _received = CallidusMessage()
+    _received.packet = memoryview(_buffer)[2:]
+    assert _received.data == { "a": [1, 2] }
+    assert _received.session_id == "s1"
+
+
+def test_message_encode_into():
+    _message = CallidusMessage(data="hello")
+    _buffer = bytearray(4096)
+    _length = _message.encode_into(buffer=_buffer, offset=10)
+
+    _received = CallidusMessage()
+    _received.packet = memoryview(_buffer)[10:10 + _length]
+    assert _received.data == "hello"
+
+
+def test_request_round_trip_buffer():
+    _request = Request(
+        request_type=RequestType.VALIDATE,
+        action="check",
+        data=[1, "two"]
+    )
+    _buffer = bytearray(4096)
+    _length = _request.encode_into(buffer=_buffer)
+
+    _received = Request()
+    _received.packet = memoryview(_buffer)[:_length]
+    assert _received.error == ""
+    assert _received.type == RequestType.VALIDATE
+    assert _received.action == "check"
+    assert _received.data == [1, "two"]
+
+
+def test_response_round_trip_buffer():
+    _response = Response(status=Status.OK, result={ "x": 1 }, msg="done")
+    _buffer = bytearray(4096)
+    _length = _response.encode_into(buffer=_buffer)
+
+    _received = Response()
+    _received.packet = bytearray(_buffer[:_length])
+    assert _received.result == { "x": 1 }
+    assert _received.msg == "done"
+
+
+def test_encode_into_too_small():
+    with pytest.raises(ValueError):
+        CallidusMessage(data="x" * 100).encode_into(buffer=bytearray(10))
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
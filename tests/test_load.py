@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+'''
+Tests for the load generator
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# System Modules
+import io
+import pytest
+
+# Local app modules
+from callidus.bench.load import LoadStats, parse_mix, run, main
+from callidus.bench.load import DEFAULT_MAX_QUEUE
+from callidus.include.typing import RequestType
+
+
+###########################################################################
+#
+# Tests
+#
+###########################################################################
+def test_parse_mix():
+    assert parse_mix("st2_action=3, VALIDATE") == [
+        (RequestType.ST2_ACTION, 3),
+        (RequestType.VALIDATE, 1)
+    ]
+
+
+@pytest.mark.parametrize("value", ["", "UNKNOWN=1", "VALIDATE=0",
+                                   "VALIDATE=x"])
+def test_parse_mix_invalid(value):
+    with pytest.raises(ValueError):
+        parse_mix(value)
+
+
+def test_stats_interval():
+    _stats = LoadStats()
+    _stats.record(100)
+    _stats.record(200, ok=False)
+    _stats.record_lost(3)
+
+    _interval = _stats.take_interval()
+    assert _interval.count == 2
+    assert _stats.errors == 4
+    assert _stats.take_interval().count == 0
+    assert _stats.total.count == 2
+
+
+def test_run():
+    _out = io.StringIO()
+    _summary = run(
+        producers=2,
+        consumers=2,
+        duration=0.5,
+        sizes=[0, 256],
+        mix=[(RequestType.ST2_ACTION, 1), (RequestType.VALIDATE, 1)],
+        window=8,
+        interval=0.2,
+        warmup=0.1,
+        drain_timeout=2.0,
+        out=_out
+    )
+
+    assert _summary["round_trips"] > 0
+    assert _summary["errors"] == 0
+    assert _summary["p50"] <= _summary["p99"] <= _summary["max"]
+    assert "rt/s" in _out.getvalue()
+
+
+def test_run_window_larger_than_queue():
+    with pytest.raises(ValueError):
+        run(duration=0.1, window=DEFAULT_MAX_QUEUE + 1)
+
+
+@pytest.mark.parametrize("argv", [
+    ["--window", str(DEFAULT_MAX_QUEUE + 1)],
+    ["--window", "0"],
+    ["--warmup", "2", "--duration", "1"],
+    ["--drain-timeout", "-1"],
+    ["--sizes", "-5"],
+    ["--mix", "NOPE"],
+    ["--interval", "0"],
+])
+def test_main_invalid_arguments(argv):
+    with pytest.raises(SystemExit) as exc:
+        main(argv)
+
+    assert exc.value.code == 2
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
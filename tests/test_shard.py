@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+'''
+Tests for session sharded message consumption
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# System Modules
+import functools
+import json
+import multiprocessing
+import threading
+import time
+import pytest
+
+# Local app modules
+from callidus.comms.batch import MessageBatch
+from callidus.comms.message import CallidusMessage
+from callidus.comms.shard import ConsistentHashRing, ShardedConsumer
+
+
+###########################################################################
+#
+# Helpers
+#
+###########################################################################
+class _Recorder():
+    ''' Handler recording the messages handled by each worker '''
+
+    def __init__(self, delay: float = 0.0):
+        self.lock = threading.Lock()
+        self.handled = []
+        self.errors = []
+        self.delay = delay
+
+    def handler(self, message: CallidusMessage) -> None:
+        if self.delay: time.sleep(self.delay)
+        with self.lock:
+            self.handled.append(
+                (threading.current_thread().name, message.session_id,
+                 message.data)
+            )
+
+    def on_error(self, err: Exception, message: CallidusMessage) -> None:
+        with self.lock:
+            self.errors.append((err, message))
+
+    def by_session(self) -> dict:
+        _sessions = {}
+        for _, _session_id, _data in self.handled:
+            _sessions.setdefault(_session_id, []).append(_data)
+        return _sessions
+
+
+def _put_data(results, message: CallidusMessage) -> None:
+    ''' Handler for process workers '''
+    results.put((message.session_id, message.data))
+
+
+###########################################################################
+#
+# ConsistentHashRing
+#
+###########################################################################
+def test_ring_empty():
+    assert ConsistentHashRing().get("key") is None
+
+
+def test_ring_is_stable():
+    _ring = ConsistentHashRing()
+    for _node in ("a", "b", "c"): _ring.add(_node)
+
+    _other = ConsistentHashRing()
+    for _node in ("c", "a", "b"): _other.add(_node)
+
+    for _index in range(1000):
+        assert _ring.get(f"k{_index}") == _other.get(f"k{_index}")
+
+
+def test_ring_add_remove_nodes():
+    _ring = ConsistentHashRing(replicas=10)
+    _ring.add("a")
+    _ring.add("a")
+    _ring.add("b")
+    assert _ring.nodes == ["a", "b"]
+
+    _ring.remove("a")
+    _ring.remove("x")
+    assert _ring.nodes == ["b"]
+    assert _ring.get("anything") == "b"
+
+
+def test_ring_minimal_movement_on_add():
+    _keys = [f"session-{_index}" for _index in range(10000)]
+    _ring = ConsistentHashRing()
+    for _index in range(4): _ring.add(f"w{_index}")
+
+    _before = { _key: _ring.get(_key) for _key in _keys }
+    _ring.add("w4")
+    _after = { _key: _ring.get(_key) for _key in _keys }
+
+    # Keys only move to the new node, and roughly 1/5 of them move
+    _moved = [_key for _key in _keys if _before[_key] != _after[_key]]
+    assert all(_after[_key] == "w4" for _key in _moved)
+    assert 0.1 < len(_moved) / len(_keys) < 0.3
+
+
+def test_ring_minimal_movement_on_remove():
+    _keys = [f"session-{_index}" for _index in range(10000)]
+    _ring = ConsistentHashRing()
+    for _index in range(5): _ring.add(f"w{_index}")
+
+    _before = { _key: _ring.get(_key) for _key in _keys }
+    _ring.remove("w2")
+    _after = { _key: _ring.get(_key) for _key in _keys }
+
+    # Only the removed node's keys move
+    for _key in _keys:
+        if _before[_key] != "w2":
+            assert _after[_key] == _before[_key]
+        else:
+            assert _after[_key] != "w2"
+
+
+def test_ring_balance():
+    _ring = ConsistentHashRing()
+    for _index in range(4): _ring.add(f"w{_index}")
+
+    _counts = {}
+    for _index in range(20000):
+        _node = _ring.get(f"session-{_index}")
+        _counts[_node] = _counts.get(_node, 0) + 1
+
+    assert len(_counts) == 4
+    assert max(_counts.values()) < 2 * min(_counts.values())
+
+
+###########################################################################
+#
+# ShardedConsumer
+#
+###########################################################################
+def test_session_handled_by_one_worker_in_order():
+    _recorder = _Recorder()
+    _consumer = ShardedConsumer(handler=_recorder.handler, workers=4,
+                                on_error=_recorder.on_error)
+    _consumer.start()
+    for _index in range(500):
+        _consumer.dispatch(
+            CallidusMessage(data=_index, session_id=f"s{_index % 10}")
+        )
+    _consumer.stop()
+
+    assert _consumer.workers == []
+    assert not _recorder.errors
+    assert len(_recorder.handled) == 500
+
+    _workers = {}
+    for _name, _session_id, _ in _recorder.handled:
+        _workers.setdefault(_session_id, set()).add(_name)
+    assert all(len(_names) == 1 for _names in _workers.values())
+
+    for _session_id, _data in _recorder.by_session().items():
+        _index = int(_session_id[1:])
+        assert _data == list(range(_index, 500, 10))
+
+
+def test_order_kept_while_adding_and_removing_workers():
+    _recorder = _Recorder(delay=0.0002)
+    _consumer = ShardedConsumer(handler=_recorder.handler, workers=2,
+                                on_error=_recorder.on_error)
+    _consumer.start()
+
+    def _dispatcher() -> None:
+        for _index in range(1000):
+            _consumer.dispatch(
+                CallidusMessage(data=_index, session_id=f"s{_index % 20}")
+            )
+
+    _thread = threading.Thread(target=_dispatcher)
+    _thread.start()
+    _added = [_consumer.add_worker() for _ in range(3)]
+    _consumer.remove_worker(name=_consumer.workers[0])
+    _consumer.remove_worker(name=_added[1])
+    _thread.join()
+    _consumer.stop()
+
+    assert not _recorder.errors
+    _sessions = _recorder.by_session()
+    assert sum(len(_data) for _data in _sessions.values()) == 1000
+    for _session_id, _data in _sessions.items():
+        _index = int(_session_id[1:])
+        assert _data == list(range(_index, 1000, 20))
+
+
+def test_messages_without_session_spread():
+    _recorder = _Recorder()
+    _consumer = ShardedConsumer(handler=_recorder.handler, workers=3)
+    _consumer.start()
+    for _index in range(30):
+        _consumer.dispatch(CallidusMessage(data=_index))
+    _consumer.stop()
+
+    assert len({ _name for _name, _, _ in _recorder.handled }) == 3
+
+
+def test_handler_error_reported():
+    _errors = []
+
+    def _handler(message: CallidusMessage) -> None:
+        if message.data == 1: raise ValueError("bad")
+
+    _consumer = ShardedConsumer(
+        handler=_handler,
+        workers=1,
+        on_error=lambda err, message: _errors.append((err, message.data))
+    )
+    _consumer.start()
+    for _index in range(3):
+        _consumer.dispatch(CallidusMessage(data=_index, session_id="s"))
+    _consumer.stop()
+
+    assert len(_errors) == 1
+    assert isinstance(_errors[0][0], ValueError)
+    assert _errors[0][1] == 1
+
+
+def test_dispatch_without_workers():
+    _consumer = ShardedConsumer(handler=lambda message: None, workers=1)
+    with pytest.raises(RuntimeError):
+        _consumer.dispatch(CallidusMessage(data=1, session_id="s"))
+
+
+@pytest.mark.parametrize("session_id", [5, ["a"], { "a": 1 }, b"s"])
+def test_dispatch_non_string_session(session_id):
+    _consumer = ShardedConsumer(handler=lambda message: None, workers=1)
+    _consumer.start()
+    try:
+        with pytest.raises(TypeError):
+            _consumer.dispatch(
+                CallidusMessage(data=1, session_id=session_id)
+            )
+    finally:
+        _consumer.stop()
+
+
+def test_handler_cannot_change_workers():
+    _errors = []
+    _consumer = None
+
+    def _handler(message: CallidusMessage) -> None:
+        _consumer.add_worker()
+
+    _consumer = ShardedConsumer(
+        handler=_handler,
+        workers=1,
+        on_error=lambda err, message: _errors.append(err)
+    )
+    _consumer.start()
+    _consumer.dispatch(CallidusMessage(data=1, session_id="s"))
+    _consumer.stop()
+
+    assert len(_errors) == 1
+    assert isinstance(_errors[0], RuntimeError)
+
+
+def test_handler_dispatch_while_rebalancing():
+    _recorder = _Recorder()
+    _started = threading.Event()
+    _release = threading.Event()
+    _consumer = None
+
+    def _handler(message: CallidusMessage) -> None:
+        if message.data == "first":
+            _started.set()
+            _release.wait()
+            _consumer.dispatch(CallidusMessage(data="next", session_id="t"))
+        _recorder.handler(message)
+
+    _consumer = ShardedConsumer(handler=_handler, workers=2,
+                                on_error=_recorder.on_error)
+    _consumer.start()
+    _consumer.dispatch(CallidusMessage(data="first", session_id="s"))
+    _started.wait()
+
+    threading.Timer(0.1, _release.set).start()
+    _consumer.add_worker()
+    _consumer.stop()
+
+    assert not _recorder.errors
+    assert { _data for _, _, _data in _recorder.handled } == {"first", "next"}
+
+
+def test_handler_dispatch_while_last_worker_removed():
+    _recorder = _Recorder()
+    _started = threading.Event()
+    _release = threading.Event()
+    _consumer = None
+
+    def _handler(message: CallidusMessage) -> None:
+        if message.data == "first":
+            _started.set()
+            _release.wait()
+            _consumer.dispatch(CallidusMessage(data="late", session_id="s"))
+
+    _consumer = ShardedConsumer(handler=_handler, workers=1,
+                                on_error=_recorder.on_error)
+    _consumer.start()
+    _consumer.dispatch(CallidusMessage(data="first", session_id="s"))
+    _started.wait()
+
+    threading.Timer(0.1, _release.set).start()
+    _consumer.stop()
+
+    # The held back message has no worker, so is reported
+    assert _consumer.workers == []
+    assert len(_recorder.errors) == 1
+    assert isinstance(_recorder.errors[0][0], RuntimeError)
+    assert _recorder.errors[0][1].data == "late"
+    assert not [
+        _thread for _thread in threading.enumerate()
+        if _thread.name.startswith("worker-") and _thread.is_alive()
+    ]
+
+
+def test_dispatch_rmq_message():
+    _recorder = _Recorder()
+    _consumer = ShardedConsumer(handler=_recorder.handler, workers=2)
+    _consumer.start()
+
+    _message = CallidusMessage(data={ "a": 1 }, session_id="s1")
+    assert _consumer.dispatch_rmq(
+        properties=_message.rmq_properties,
+        body=_message.packet
+    ) == 1
+    _consumer.stop()
+
+    assert _recorder.by_session() == { "s1": [{ "a": 1 }] }
+
+
+def test_dispatch_rmq_batch():
+    _recorder = _Recorder()
+    _consumer = ShardedConsumer(handler=_recorder.handler, workers=3)
+    _consumer.start()
+
+    _batch = MessageBatch(messages=[
+        CallidusMessage(data=_index, session_id=f"s{_index % 3}")
+        for _index in range(30)
+    ])
+    assert _consumer.dispatch_rmq(
+        properties=_batch.rmq_properties,
+        body=memoryview(_batch.packet)
+    ) == 30
+    _consumer.stop()
+
+    for _session_id, _data in _recorder.by_session().items():
+        _index = int(_session_id[1:])
+        assert _data == list(range(_index, 30, 3))
+
+
+@pytest.mark.parametrize("body", [
+    b"{not json",
+    b"[" * 100000 + b"]" * 100000,
+    b"\xff\xfe",
+    b"5",
+])
+def test_dispatch_rmq_bad_body(body):
+    _recorder = _Recorder()
+    _consumer = ShardedConsumer(handler=_recorder.handler, workers=1,
+                                on_error=_recorder.on_error)
+    _consumer.start()
+    try:
+        assert _consumer.dispatch_rmq(properties=None, body=body) == 0
+        _batch_properties = MessageBatch().rmq_properties
+        assert _consumer.dispatch_rmq(
+            properties=_batch_properties, body=body
+        ) == 0
+    finally:
+        _consumer.stop()
+
+    assert not _recorder.handled
+
+
+@pytest.mark.parametrize("session_id", [5, ["a"], { "a": 1 }, True])
+def test_dispatch_rmq_non_string_session(session_id):
+    _recorder = _Recorder()
+    _consumer = ShardedConsumer(handler=_recorder.handler, workers=2,
+                                on_error=_recorder.on_error)
+    _consumer.start()
+
+    _body = json.dumps(
+        { "data": 1, "properties": { "session_id": session_id } }
+    ).encode()
+    assert _consumer.dispatch_rmq(properties=None, body=_body) == 0
+
+    _batch = json.loads(MessageBatch(messages=[
+        CallidusMessage(data=_index, session_id="ok") for _index in range(2)
+    ]).packet)
+    _batch["batch"].append(
+        { "data": 2, "properties": { "session_id": session_id } }
+    )
+    assert _consumer.dispatch_rmq(
+        properties=MessageBatch().rmq_properties,
+        body=json.dumps(_batch).encode()
+    ) == 2
+    _consumer.stop()
+
+    assert _recorder.by_session() == { "ok": [0, 1] }
+    assert len(_recorder.errors) == 2
+    assert all(isinstance(_err, TypeError) for _err, _ in _recorder.errors)
+
+
+def test_process_workers():
+    _results = multiprocessing.Queue()
+    _consumer = ShardedConsumer(
+        handler=functools.partial(_put_data, _results),
+        workers=2,
+        use_processes=True
+    )
+    _consumer.start()
+    for _index in range(40):
+        _consumer.dispatch(
+            CallidusMessage(data=_index, session_id=f"s{_index % 4}")
+        )
+    _consumer.stop()
+
+    _sessions = {}
+    for _ in range(40):
+        _session_id, _data = _results.get(timeout=10)
+        _sessions.setdefault(_session_id, []).append(_data)
+
+    for _session_id, _data in _sessions.items():
+        _index = int(_session_id[1:])
+        assert _data == list(range(_index, 40, 4))
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
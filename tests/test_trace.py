@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+'''
+Tests for message tracing and latency histograms
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# System Modules
+import random
+import pytest
+import pika
+
+# Local app modules
+from callidus.comms.message import CallidusMessage, MAX_TRACE_HOPS
+from callidus.comms.trace import LatencyHistogram, LatencyCollector
+from callidus.include.typing import MessagePort
+
+
+###########################################################################
+#
+# LatencyHistogram
+#
+###########################################################################
+def test_histogram_empty():
+    _histogram = LatencyHistogram()
+    assert _histogram.count == 0
+    assert _histogram.percentile(99) == 0
+
+
+def test_histogram_small_values_exact():
+    _histogram = LatencyHistogram(precision_bits=5)
+    for _value in range(64):
+        _histogram.record(_value)
+
+    assert _histogram.min == 0
+    assert _histogram.max == 63
+    assert _histogram.percentile(50) == 31
+    assert _histogram.percentile(100) == 63
+
+
+@pytest.mark.parametrize("precision_bits", [3, 5, 7])
+def test_histogram_percentile_error_bound(precision_bits):
+    _random = random.Random(precision_bits)
+    _values = [
+        int(_random.lognormvariate(8, 2)) for _ in range(20000)
+    ]
+
+    _histogram = LatencyHistogram(precision_bits=precision_bits)
+    for _value in _values:
+        _histogram.record(_value)
+
+    _values.sort()
+    _bound = 1 / (1 << precision_bits)
+    for _percentile in (1, 10, 50, 90, 99, 99.9, 100):
+        _index = max(1, -(-len(_values) * _percentile // 100)) - 1
+        _exact = _values[int(_index)]
+        _estimate = _histogram.percentile(_percentile)
+
+        # Values are reported as the top of their bucket
+        assert _estimate >= _exact
+        assert _estimate - _exact <= _exact * _bound
+
+
+def test_histogram_clamps_values():
+    _histogram = LatencyHistogram(max_value=1000)
+    _histogram.record(-5)
+    _histogram.record(10 ** 9)
+
+    assert _histogram.min == 0
+    assert _histogram.max == 1000
+    assert _histogram.percentile(100) == 1000
+
+
+def test_histogram_stats():
+    _histogram = LatencyHistogram()
+    _histogram.record(10, count=3)
+    _histogram.record(40)
+
+    assert _histogram.count == 4
+    assert _histogram.mean == 17.5
+
+
+def test_histogram_merge():
+    _first = LatencyHistogram()
+    _second = LatencyHistogram()
+    for _value in range(100):
+        _first.record(_value)
+        _second.record(_value + 1000)
+
+    _first.merge(_second)
+    assert _first.count == 200
+    assert _first.min == 0
+    assert _first.max == 1099
+    assert _first.percentile(50) == 99
+
+
+def test_histogram_reset():
+    _histogram = LatencyHistogram()
+    _histogram.record(100)
+    _histogram.reset()
+
+    assert _histogram.count == 0
+    assert _histogram.percentile(50) == 0
+
+
+###########################################################################
+#
+# Message trace
+#
+###########################################################################
+def test_add_hop_limited():
+    _message = CallidusMessage()
+    for _index in range(MAX_TRACE_HOPS + 10):
+        _message.add_hop(f"node{_index}")
+
+    assert len(_message.trace) == MAX_TRACE_HOPS
+    assert _message.trace[0][0] == "node10"
+    assert _message.trace[-1][1] >= _message.trace[0][1]
+
+
+def test_trace_round_trip():
+    _message = CallidusMessage(data=1)
+    _message.add_hop("a")
+    _message.add_hop("b")
+
+    _received = CallidusMessage()
+    _received.rmq_properties = _message.rmq_properties
+    assert _received.trace == _message.trace
+
+    _received = CallidusMessage()
+    _received.packet = _message.packet
+    assert _received.trace == _message.trace
+
+
+def test_trace_not_sent_when_empty():
+    assert "trace" not in CallidusMessage().rmq_properties.headers
+
+
+def test_trace_invalid_hops_dropped():
+    _properties = pika.BasicProperties(headers={
+        "trace": [
+            ["a", 1],
+            ["b", True],
+            ["c", "2"],
+            ["d"],
+            "e",
+            [b"\xff", 3],
+            ["f", 4, 5],
+            [6, 7],
+        ]
+    })
+
+    _message = CallidusMessage()
+    _message.rmq_properties = _properties
+    assert _message.trace == [["a", 1], ["�", 3], ["6", 7]]
+
+
+@pytest.mark.parametrize("trace", [None, "trace", 5, { "a": 1 }])
+def test_trace_invalid(trace):
+    _message = CallidusMessage()
+    _message.rmq_properties = pika.BasicProperties(headers={ "trace": trace })
+    assert _message.trace == []
+
+
+###########################################################################
+#
+# LatencyCollector
+#
+###########################################################################
+def _traced(sender: str, receiver: str, hops: list) -> CallidusMessage:
+    ''' A message with a fixed trace '''
+    _message = CallidusMessage(
+        sender=sender,
+        receiver=receiver,
+        receiver_port=MessagePort.REMOTE
+    )
+    _message.trace = [list(_hop) for _hop in hops]
+    return _message
+
+
+def test_collector_hops_and_paths():
+    _collector = LatencyCollector()
+    _collector.record(_traced("s", "r", [("s", 0), ("x", 100), ("r", 5100)]))
+    _collector.record(_traced("s", "r", [("s", 0), ("x", 200), ("r", 300)]))
+
+    _hops = _collector.hops
+    assert _hops[("s", "x", MessagePort.REMOTE)].max == 200
+    assert _hops[("x", "r", MessagePort.REMOTE)].max == 5000
+    assert _collector.paths[("s", "r", MessagePort.REMOTE)].count == 2
+
+    _slowest = _collector.slowest_hops(percentile=100, limit=1)
+    assert _slowest[0][0] == ("x", "r", MessagePort.REMOTE)
+
+
+def test_collector_ignores_short_trace():
+    _collector = LatencyCollector()
+    _collector.record(_traced("s", "r", [("s", 0)]))
+    _collector.record(None)
+
+    assert _collector.hops == {}
+    assert _collector.paths == {}
+
+
+def test_collector_evicts_least_recent():
+    _collector = LatencyCollector(max_keys=2)
+    _collector.record(_traced("s", "r", [("a", 0), ("b", 1)]))
+    _collector.record(_traced("s", "r", [("c", 0), ("d", 1)]))
+    _collector.record(_traced("s", "r", [("a", 0), ("b", 1)]))
+    _collector.record(_traced("s", "r", [("e", 0), ("f", 1)]))
+
+    _keys = set(_collector.hops)
+    assert _keys == {
+        ("a", "b", MessagePort.REMOTE),
+        ("e", "f", MessagePort.REMOTE)
+    }
+
+    _collector.reset()
+    assert _collector.hops == {}
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass
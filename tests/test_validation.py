@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+'''
+Tests for request ingress validation
+
+Copyright (C) 2025 Jason Piszcyk
+Email: Jason.Piszcyk@gmail.com
+
+All rights reserved.
+
+This software is private and may NOT be copied, distributed, reverse engineered,
+decompiled, or modified without the express written permission of the copyright
+holder.
+
+The copyright holder makes no warranties, express or implied, about its
+suitability for any particular purpose.
+'''
+###########################################################################
+#
+# Imports
+#
+###########################################################################
+from __future__ import annotations
+
+# System Modules
+import pytest
+from appcore.conversion import ENCODE_METHOD
+from appcore.conversion import to_json, to_base64
+
+# Local app modules
+from callidus.comms.request import Request, MAX_PACKET_SIZE
+from callidus.comms.validation import compile_schema, RequestValidator
+from callidus.include.typing import Status, RequestType
+
+
+###########################################################################
+#
+# Helpers
+#
+###########################################################################
+def _packet(msg_dict) -> bytes:
+    ''' Encode a request dict the way Request.packet does '''
+    _value_json = to_json(data=msg_dict, skip_invalid=True)
+    return to_base64(
+        data=_value_json.encode(ENCODE_METHOD)
+    ).encode(ENCODE_METHOD)
+
+
+def _validator() -> RequestValidator:
+    ''' A validator with a single registered action '''
+    _validator = RequestValidator()
+    _validator.register(
+        request_type=RequestType.ST2_ACTION,
+        action="run",
+        schema={ "name": str, "count?": int, "tags?": [str] }
+    )
+    return _validator
+
+
+###########################################################################
+#
+# compile_schema
+#
+###########################################################################
+@pytest.mark.parametrize("schema, value", [
+    (None, object()),
+    (str, "x"),
+    (int, 3),
+    (float, 3),
+    (float, 1.5),
+    (bool, True),
+    (type(None), None),
+    ([int], []),
+    ([int], [1, 2, 3]),
+    ((int, str), "x"),
+    ((int, str), 1),
+    ({ "a": int, "b?": str }, { "a": 1 }),
+    ({ "a": int, "b?": str }, { "a": 1, "b": "x" }),
+    ({ "a": { "b": [{ "c": int }] } }, { "a": { "b": [{ "c": 1 }] } }),
+])
+def test_schema_accepts(schema, value):
+    assert compile_schema(schema=schema)(value) == ""
+
+
+@pytest.mark.parametrize("schema, value, error", [
+    (str, 1, "'data' must be of type 'str'"),
+    (int, True, "'data' must be of type 'int'"),
+    (int, 1.5, "'data' must be of type 'int'"),
+    (float, False, "'data' must be of type 'float'"),
+    ([int], [1, "x"], "'data[]' must be of type 'int'"),
+    ([int], { "a": 1 }, "'data' must be of type 'list'"),
+    ((int, str), 1.5, "'data' must be of type 'str'"),
+    ({ "a": int }, [], "'data' must be of type 'dict'"),
+    ({ "a": int }, {}, "'data.a' is required"),
+    ({ "a": int }, { "a": 1, "b": 2 }, "'data.b' is not permitted"),
+    ({ "a?": int }, { "a": "x" }, "'data.a' must be of type 'int'"),
+    ({ "a": { "b": [{ "c": int }] } }, { "a": { "b": [{ "c": "x" }] } },
+        "'data.a.b[].c' must be of type 'int'"),
+])
+def test_schema_rejects(schema, value, error):
+    assert compile_schema(schema=schema)(value) == error
+
+
+@pytest.mark.parametrize("schema", [
+    set,
+    object,
+    [int, str],
+    [],
+    (),
+    { 1: int },
+    { "a": bytes },
+    "str",
+])
+def test_invalid_schema(schema):
+    with pytest.raises(TypeError):
+        compile_schema(schema=schema)
+
+
+###########################################################################
+#
+# RequestValidator
+#
+###########################################################################
+def test_ingest_valid():
+    _packet_bytes = Request(
+        request_type=RequestType.ST2_ACTION,
+        action="run",
+        data={ "name": "job", "count": 2, "tags": ["a"] }
+    ).packet
+
+    _request, _response = _validator().ingest(packet=_packet_bytes)
+    assert _response is None
+    assert _request.action == "run"
+    assert _request.data["name"] == "job"
+
+
+def test_ingest_from_buffer():
+    _packet_bytes = Request(
+        request_type=RequestType.ST2_ACTION,
+        action="run",
+        data={ "name": "job" }
+    ).packet
+
+    _request, _response = _validator().ingest(
+        packet=memoryview(bytearray(_packet_bytes))
+    )
+    assert _response is None
+    assert _request.data == { "name": "job" }
+
+
+def test_ingest_schema_mismatch():
+    _packet_bytes = Request(
+        request_type=RequestType.ST2_ACTION,
+        action="run",
+        data={ "name": 5 }
+    ).packet
+
+    _, _response = _validator().ingest(packet=_packet_bytes)
+    assert _response.status == Status.EXEC_ERROR
+    assert _response.msg == "'data.name' must be of type 'str'"
+
+
+def test_ingest_unknown_action():
+    _packet_bytes = Request(
+        request_type=RequestType.ST2_ACTION,
+        action="delete",
+        data={}
+    ).packet
+
+    _, _response = _validator().ingest(packet=_packet_bytes)
+    assert _response.status == Status.INVALID_ACTION
+
+
+@pytest.mark.parametrize("action", [["run"], { "a": 1 }, 5])
+def test_ingest_non_string_action(action):
+    _packet_bytes = _packet({
+        "type": RequestType.ST2_ACTION.value,
+        "action": action,
+        "data": { "name": "job" }
+    })
+
+    _request, _response = _validator().ingest(packet=_packet_bytes)
+    assert _request.action == ""
+    assert _response.status == Status.EXEC_ERROR
+
+
+@pytest.mark.parametrize("msg_dict", [
+    ["not", "a", "request"],
+    "request",
+    None,
+])
+def test_ingest_not_a_request(msg_dict):
+    _, _response = _validator().ingest(packet=_packet(msg_dict))
+    assert _response.status == Status.EXEC_ERROR
+
+
+def test_ingest_deep_nesting():
+    _value_json = "[" * 100000 + "]" * 100000
+    _packet_bytes = to_base64(
+        data=_value_json.encode(ENCODE_METHOD)
+    ).encode(ENCODE_METHOD)
+
+    _, _response = _validator().ingest(packet=_packet_bytes)
+    assert _response.status == Status.EXEC_ERROR
+
+
+@pytest.mark.parametrize("packet", [b"not base64!", b"\xff\xfe", "text"])
+def test_ingest_invalid_packet(packet):
+    _, _response = _validator().ingest(packet=packet)
+    assert _response.status == Status.EXEC_ERROR
+
+
+def test_ingest_oversize():
+    _validator_small = RequestValidator(max_packet_size=64)
+    _, _response = _validator_small.ingest(packet=b"A" * 65)
+    assert _response.status == Status.EXEC_ERROR
+    assert "exceeds limit" in _response.msg
+
+
+def test_request_oversize_not_decoded():
+    _request = Request()
+    _request.packet = b"A" * (MAX_PACKET_SIZE + 1)
+    assert "exceeds limit" in _request.error
+    assert _request.data is None
+
+
+###########################################################################
+#
+# In case this is run directly rather than imported...
+#
+###########################################################################
+'''
+Handle case of being run directly rather than imported
+'''
+if __name__ == "__main__":
+    pass